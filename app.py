@@ -1,24 +1,29 @@
 ###### app.py - Complete FastAPI 
 
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse
 import uvicorn
-import time
 import os
 import sys
 
 # Add for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from project.serving.api import lifespan, router
+
 app = FastAPI(
     title="🤖 Medical ChatAPP API",
     description="Medical ChatAPP",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan("Medical ChatAPP Server", [
+        "🌐 Server: http://localhost:8001",
+        "📚 Docs:   http://localhost:8001/docs",
+        "💬 Chat:   http://localhost:8001/chat"
+    ])
 )
 
 # Enable CORS
@@ -30,38 +35,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Request/Response models
-class ChatRequest(BaseModel):
-    message: str
-
-class ChatResponse(BaseModel):
-    answer: str
-    processing_time: float
-    success: bool
-
-# Global chatbot
-chatbot = None
-
-@app.on_event("startup")
-def startup():
-    """Load chatbot on startup"""
-    global chatbot
-    print("=" * 50)
-    print("🚀 Starting Medical ChatAPP Server...")
-    
-    try:
-        from project.pipeline import main_pipeline
-        chatbot = main_pipeline()
-        print("✅ Chatbot loaded successfully!")
-    except Exception as e:
-        print(f"❌ Failed to load chatbot: {e}")
-        print("💡 Make sure you ran: python build_vector_store.py")
-        chatbot = None
-    
-    print(f"🌐 Server: http://localhost:8001")
-    print(f"📚 Docs:   http://localhost:8001/docs")
-    print(f"💬 Chat:   http://localhost:8001/chat")
-    print("=" * 50)
+# /api/* and /metrics (project.serving.api)
+app.include_router(router)
 
 # ---------------------------
 # ROUTES
@@ -140,24 +115,69 @@ async def home():
         </div>
         
         <script>
+            function escapeHtml(text) {
+                const div = document.createElement('div');
+                div.textContent = text;
+                return div.innerHTML;
+            }
+
             async function ask() {
                 const question = document.getElementById('question').value;
                 const responseDiv = document.getElementById('response');
                 responseDiv.innerHTML = '<em>Thinking...</em>';
                 
                 try {
-                    const response = await fetch('/api/chat', {
+                    const response = await fetch('/api/chat/stream', {
                         method: 'POST',
                         headers: {'Content-Type': 'application/json'},
                         body: JSON.stringify({message: question})
                     });
-                    
-                    const data = await response.json();
+                    if (!response.ok) {
+                        const err = await response.json();
+                        responseDiv.innerHTML = '<em>Error: ' + escapeHtml(err.detail) + '</em>';
+                        return;
+                    }
+
                     responseDiv.innerHTML = `
-                        <strong>Question:</strong> ${question}<br><br>
-                        <strong>Answer:</strong> ${data.answer}<br>
-                        <small>Time: ${data.processing_time}s</small>
+                        <strong>Question:</strong> ${escapeHtml(question)}<br><br>
+                        <strong>Answer:</strong> <span id="answer"></span><br>
+                        <small id="sources"></small><br>
+                        <small id="timing"></small>
                     `;
+                    const answerSpan = document.getElementById('answer');
+
+                    const reader = response.body.getReader();
+                    const decoder = new TextDecoder();
+                    let buffer = '';
+                    while (true) {
+                        const {value, done} = await reader.read();
+                        if (done) break;
+                        buffer += decoder.decode(value, {stream: true});
+
+                        // SSE events are separated by a blank line
+                        let boundary;
+                        while ((boundary = buffer.indexOf('\\n\\n')) !== -1) {
+                            const raw = buffer.slice(0, boundary);
+                            buffer = buffer.slice(boundary + 2);
+                            let event = 'message', data = '';
+                            for (const line of raw.split('\\n')) {
+                                if (line.startsWith('event: ')) event = line.slice(7);
+                                else if (line.startsWith('data: ')) data += line.slice(6);
+                            }
+                            const payload = JSON.parse(data);
+                            if (event === 'sources') {
+                                const pages = payload.map(s => (s.name || s.source || '?') + ' p.' + s.page);
+                                document.getElementById('sources').textContent = 'Sources: ' + pages.join(', ');
+                            } else if (event === 'token') {
+                                answerSpan.textContent += payload.token;
+                            } else if (event === 'done') {
+                                document.getElementById('timing').textContent =
+                                    `Time: ${payload.processing_time}s (first token ${payload.time_to_first_token}s)`;
+                            } else if (event === 'error') {
+                                answerSpan.innerHTML += '<em>Error: ' + escapeHtml(payload.detail) + '</em>';
+                            }
+                        }
+                    }
                 } catch (error) {
                     responseDiv.innerHTML = '<em>Error: ' + error + '</em>';
                 }
@@ -178,51 +198,6 @@ async def chat_page():
     """Alternative chat page"""
     return await home()
 
-@app.get("/api")
-async def api_info():
-    """API information"""
-    return {
-        "name": "Medical ChatAPP API",
-        "version": "1.0.0",
-        "endpoints": {
-            "chat": "POST /api/chat",
-            "health": "GET /api/health",
-            "docs": "GET /docs"
-        },
-        "chatbot_loaded": chatbot is not None
-    }
-
-@app.get("/api/health")
-async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy" if chatbot else "degraded",
-        "chatbot_loaded": chatbot is not None,
-        "timestamp": time.time()
-    }
-
-@app.post("/api/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
-    """Chat with the ML chatbot"""
-    start_time = time.time()
-    
-    if not chatbot:
-        return ChatResponse(
-            answer="Chatbot not loaded. Please check server logs.",
-            processing_time=time.time() - start_time,
-            success=False
-        )
-    
-    try:
-        response = chatbot.invoke({"input": request.message})
-        return ChatResponse(
-            answer=response["answer"],
-            processing_time=round(time.time() - start_time, 3),
-            success=True
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
-
 if __name__ == "__main__":
     print("🌐 Starting server on port 8001...")
     uvicorn.run(
@@ -0,0 +1,136 @@
+"""
+Recall-vs-latency benchmark of the ANN index types against the flat baseline.
+
+    python -m benchmarks.ann_benchmark --index faiss_index          # vectors of the built index
+    python -m benchmarks.ann_benchmark --synthetic 100000 --dim 384  # clustered synthetic corpus
+
+Every index is built on the same vectors; queries are perturbed corpus
+vectors and ground truth is the exact flat top-k.
+"""
+import argparse
+import json
+import os
+import time
+
+import faiss
+import numpy as np
+
+from project.store.index_factory import build_index, set_search_params
+from project.store.versions import resolve_index_path
+
+
+def load_vectors(path: str) -> np.ndarray:
+    """
+    Vectors of a built index (its CURRENT version when versioned)
+    """
+    path = resolve_index_path(path)
+    index_file = os.path.join(path, "index.faiss")
+    if not os.path.exists(index_file):
+        raise FileNotFoundError(f"No index.faiss in '{path}' (sharded indexes are not supported)")
+    index = faiss.read_index(index_file)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        # IVF vectors are only addressable by position through a direct map
+        ivf.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype("float32")
+    labels = rng.integers(0, clusters, size=n)
+    vectors = centers[labels] + 0.3 * rng.normal(size=(n, dim)).astype("float32")
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_queries(vectors: np.ndarray, n: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.choice(len(vectors), size=n, replace=False)]
+    queries = picks + 0.05 * rng.normal(size=picks.shape).astype("float32")
+    return np.ascontiguousarray(queries, dtype="float32")
+
+
+def time_queries(index, queries: np.ndarray, k: int):
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        results.append(ids[0])
+    latencies = np.array(latencies) * 1000
+    return np.array(results), {
+        "mean_ms": round(float(latencies.mean()), 4),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 4)
+    }
+
+
+def recall_at_k(results: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    return round(hits / truth.size, 4)
+
+
+def index_bytes(index) -> int:
+    return int(faiss.serialize_index(index).size)
+
+
+def run(vectors: np.ndarray, queries: np.ndarray, k: int, train_size: int, configs: list) -> list:
+    rows = []
+    truth = None
+    for index_type, params, sweep_name, sweep in configs:
+        start = time.perf_counter()
+        sample = vectors[np.random.default_rng(2).choice(len(vectors), size=min(train_size, len(vectors)), replace=False)]
+        index = build_index(index_type, sample, **params)
+        index.add(vectors)
+        build_seconds = time.perf_counter() - start
+
+        for value in sweep:
+            if sweep_name == "nprobe":
+                set_search_params(index, nprobe=value)
+            elif sweep_name == "ef_search":
+                set_search_params(index, ef_search=value)
+            results, latency = time_queries(index, queries, k)
+            if truth is None:
+                truth = results  # first config is the flat baseline
+            row = {
+                "index_type": index_type,
+                "params": params,
+                sweep_name or "param": value,
+                f"recall@{k}": recall_at_k(results, truth),
+                **latency,
+                "build_seconds": round(build_seconds, 3),
+                "index_mb": round(index_bytes(index) / 1e6, 2)
+            }
+            rows.append(row)
+            print(f"{index_type:<9} {sweep_name or '-':>9}={str(value):<5} recall@{k}={row[f'recall@{k}']:<6} "
+                  f"mean={row['mean_ms']}ms p95={row['p95_ms']}ms size={row['index_mb']}MB")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ANN recall vs latency benchmark")
+    parser.add_argument("--index", default=None, help="read vectors from a built faiss_index")
+    parser.add_argument("--synthetic", type=int, default=50000, help="synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--train-size", type=int, default=20000)
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.index) if args.index else synthetic_vectors(args.synthetic, args.dim)
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    queries = make_queries(vectors, min(args.queries, len(vectors)))
+    print(f"📊 {len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, k={args.k}")
+
+    configs = [
+        ("flat", {}, None, [None]),
+        ("ivf_flat", {}, "nprobe", [1, 4, 16, 64]),
+        ("hnsw", {"hnsw_m": 32}, "ef_search", [16, 32, 64, 128]),
+        ("ivf_pq", {}, "nprobe", [1, 4, 16, 64]),
+    ]
+    rows = run(vectors, queries, args.k, args.train_size, configs)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"vectors": len(vectors), "dim": int(vectors.shape[1]), "k": args.k, "results": rows}, f, indent=2)
@@ -0,0 +1,156 @@
+"""
+Chunking strategies compared on the same corpus: index size, build time,
+retrieval latency and recall@k.
+
+    python -m benchmarks.chunking_benchmark --data project/data/Medical_book.pdf --max-pages 300
+    python -m benchmarks.chunking_benchmark --strategies recursive sentence --output chunking.json
+    python -m benchmarks.chunking_benchmark --fake-embeddings      # offline smoke run
+
+Queries are passages sampled from the pages (a window of --query-words
+words); a query is a hit when one of its top-k chunks contains the
+sampled passage, so recall drops when a strategy cuts passages apart or
+buries them in chunks the embedder cannot represent. Uses the configured
+embedding model (EMBEDDING_BACKEND) unless --fake-embeddings is given.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from benchmarks.e2e_benchmark import synthetic_corpus
+from project.chunk import chunking_config, iter_split_documents
+from project.chunk.strategies import CHUNK_STRATEGIES
+from project.store import VectorStorePipeline
+from project.store.incremental import IncrementalIndexBuilder
+from project.store.versions import resolve_index_path
+
+
+def load_pages(args) -> list:
+    if args.data:
+        from project.load_data import DirectoryDocumentProcessor
+        pages = DirectoryDocumentProcessor(args.data, workers=args.loader_workers).lazy_load_documents()
+    else:
+        pages = synthetic_corpus(args.pages)
+    pages = [page for page in pages if page.page_content.strip()]
+    return pages[:args.max_pages] if args.max_pages else pages
+
+
+def make_queries(pages, n: int, words: int, seed: int = 1) -> list:
+    """
+    Passages of `words` words from random pages (each one is its own query)
+    """
+    rng = random.Random(seed)
+    texts = [page.page_content.split() for page in pages]
+    texts = [tokens for tokens in texts if len(tokens) > words]
+    if not texts:
+        raise ValueError(f"No page has more than {words} words, lower --query-words")
+    queries = []
+    while len(queries) < n:
+        tokens = rng.choice(texts)
+        start = rng.randrange(len(tokens) - words)
+        passage = " ".join(tokens[start:start + words])
+        queries.append(passage)
+    return queries
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def dir_bytes(path: str) -> int:
+    total = 0
+    for folder, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(folder, name)) for name in files)
+    return total
+
+
+def bench_strategy(strategy: str, pages, queries, embedding, args, workdir: str) -> dict:
+    config = chunking_config(strategy, args.chunk_size, args.chunk_overlap)
+    index_path = os.path.join(workdir, strategy)
+
+    start = time.perf_counter()
+    chunks = list(iter_split_documents(pages, config["chunk_size"], config["chunk_overlap"], strategy,
+                                       embedding=embedding))
+    chunk_seconds = time.perf_counter() - start
+
+    builder = IncrementalIndexBuilder(embedding, index_path, batch_size=args.batch_size, model_name="bench")
+    stats = builder.build(iter(chunks))
+    build_seconds = time.perf_counter() - start
+
+    retriever = VectorStorePipeline(index_path).load_retriever(embedding, k=args.k)
+    hits = 0
+    latencies = []
+    for passage in queries:
+        t = time.perf_counter()
+        docs = retriever.invoke(passage)
+        latencies.append(time.perf_counter() - t)
+        hits += any(normalize(passage) in normalize(doc.page_content) for doc in docs)
+    ms = np.array(latencies) * 1000
+
+    lengths = [len(doc.page_content) for doc in chunks]
+    return {
+        **config,
+        "chunks": stats["chunks"],
+        "mean_chunk_chars": round(float(np.mean(lengths)), 1),
+        "index_mb": round(dir_bytes(resolve_index_path(index_path)) / 2 ** 20, 3),
+        "chunk_seconds": round(chunk_seconds, 3),
+        "build_seconds": round(build_seconds, 3),
+        "query_p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "query_p95_ms": round(float(np.percentile(ms, 95)), 3),
+        f"recall@{args.k}": round(hits / len(queries), 4)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare chunking strategies")
+    parser.add_argument("--strategies", nargs="+", default=list(CHUNK_STRATEGIES), choices=CHUNK_STRATEGIES)
+    parser.add_argument("--data", default=None, help="PDF file/directory instead of the synthetic corpus")
+    parser.add_argument("--pages", type=int, default=200, help="synthetic corpus pages")
+    parser.add_argument("--max-pages", type=int, default=None)
+    parser.add_argument("--loader-workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=None, help="default: each strategy's default")
+    parser.add_argument("--chunk-overlap", type=int, default=None)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-words", type=int, default=12)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--fake-embeddings", action="store_true")
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    args = parser.parse_args()
+
+    if args.fake_embeddings:
+        embedding = DeterministicFakeEmbedding(size=384)
+    else:
+        from project.embed import DEFAULT_MODEL_NAME, get_embedding_engine
+        embedding = get_embedding_engine(DEFAULT_MODEL_NAME)
+
+    pages = load_pages(args)
+    queries = make_queries(pages, args.queries, args.query_words)
+    print(f"📊 {len(pages)} pages, {len(queries)} queries")
+
+    workdir = tempfile.mkdtemp(prefix="chunking_bench_")
+    results = []
+    try:
+        for strategy in args.strategies:
+            print(f"✂️  {strategy}...")
+            results.append(bench_strategy(strategy, pages, queries, embedding, args, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    recall = f"recall@{args.k}"
+    print(f"\n{'strategy':<10} {'size':>6} {'chunks':>7} {'index MB':>9} {'build s':>8} {'p50 ms':>7} {recall:>9}")
+    for row in results:
+        print(f"{row['strategy']:<10} {row['chunk_size']:>6} {row['chunks']:>7} {row['index_mb']:>9} "
+              f"{row['build_seconds']:>8} {row['query_p50_ms']:>7} {row[recall]:>9}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
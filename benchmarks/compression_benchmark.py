@@ -0,0 +1,80 @@
+"""
+Memory saved vs recall lost by compressed vector storage, against the
+float32 flat index.
+
+    python -m benchmarks.compression_benchmark --index faiss_index          # vectors of the built index
+    python -m benchmarks.compression_benchmark --synthetic 100000 --dim 384 --pca 192 96
+
+Every configuration (float16 / sq8 storage, optionally after a PCA
+projection) is built on the same vectors; ground truth is the exact
+float32 top-k, so recall@k is the fraction of true neighbours kept.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.ann_benchmark import (
+    index_bytes, load_vectors, make_queries, recall_at_k, synthetic_vectors, time_queries
+)
+from project.store.index_factory import VECTOR_CODECS, build_index, index_spec
+
+
+def run(vectors: np.ndarray, queries: np.ndarray, k: int, train_size: int, configs: list) -> list:
+    rows = []
+    truth = baseline = None
+    sample = vectors[np.random.default_rng(2).choice(len(vectors), size=min(train_size, len(vectors)), replace=False)]
+    for codec, pca_dim in configs:
+        start = time.perf_counter()
+        index = build_index("flat", sample, codec=codec, pca_dim=pca_dim)
+        index.add(vectors)
+        build_seconds = time.perf_counter() - start
+
+        results, latency = time_queries(index, queries, k)
+        size = index_bytes(index)
+        if truth is None:
+            truth, baseline = results, size  # first config is the float32 flat index
+        row = {
+            "spec": index_spec("flat", vectors.shape[1], codec=codec, pca_dim=pca_dim),
+            "codec": codec,
+            "pca_dim": pca_dim,
+            "bytes_per_vector": round(size / len(vectors), 1),
+            "index_mb": round(size / 1e6, 2),
+            "memory_saved": round(1 - size / baseline, 4),
+            f"recall@{k}": recall_at_k(results, truth),
+            **latency,
+            "build_seconds": round(build_seconds, 3)
+        }
+        rows.append(row)
+        print(f"{row['spec']:<14} {row['index_mb']:>8}MB saved={row['memory_saved']:<7.2%} "
+              f"recall@{k}={row[f'recall@{k}']:<6} mean={row['mean_ms']}ms p95={row['p95_ms']}ms")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vector compression: memory saved vs recall lost")
+    parser.add_argument("--index", default=None, help="read vectors from a built faiss_index")
+    parser.add_argument("--synthetic", type=int, default=50000, help="synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--pca", type=int, nargs="*", default=None, help="PCA dims (default: dim/2 and dim/4)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--train-size", type=int, default=20000)
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.index) if args.index else synthetic_vectors(args.synthetic, args.dim)
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    queries = make_queries(vectors, min(args.queries, len(vectors)))
+    dim = vectors.shape[1]
+    print(f"📊 {len(vectors)} vectors x {dim} dims, {len(queries)} queries, k={args.k}")
+
+    pca_dims = args.pca if args.pca is not None else [dim // 2, dim // 4]
+    configs = [(codec, None) for codec in VECTOR_CODECS]
+    configs += [(codec, pca_dim) for pca_dim in pca_dims for codec in VECTOR_CODECS]
+    rows = run(vectors, queries, args.k, args.train_size, configs)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"vectors": len(vectors), "dim": dim, "k": args.k, "results": rows}, f, indent=2)
@@ -0,0 +1,250 @@
+"""
+Offline end-to-end benchmark: ingestion, retrieval and POST /api/chat.
+
+    python -m benchmarks.e2e_benchmark --pages 2000 --queries 200 --concurrency 1 4 16
+    python -m benchmarks.e2e_benchmark --data /path/to/pdfs --output run.json
+    python -m benchmarks.e2e_benchmark --baseline run.json     # exit 1 on regression
+
+The index is built from a synthetic (or fixture PDF) corpus with fake
+embeddings, and main_pipeline() runs with StubChatModel in place of
+ChatGroq, so no network access or model weights are needed. Latencies
+are reported as p50/p95/p99 plus QPS per concurrency level.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from benchmarks.stubs import StubChatModel
+from project.chunk import iter_split_documents
+from project.store.incremental import IncrementalIndexBuilder
+
+
+TERMS = (
+    "asthma bronchitis pneumonia hypertension diabetes insulin anemia hemoglobin migraine seizure "
+    "arthritis cartilage fracture osteoporosis hepatitis cirrhosis jaundice gastritis ulcer colitis "
+    "dermatitis eczema psoriasis melanoma leukemia lymphoma antibiotic vaccine allergy histamine "
+    "thyroid hormone cortisol kidney dialysis cataract glaucoma retina tinnitus vertigo"
+).split()
+FILLER = (
+    "the patient may present with symptoms including pain fever fatigue and swelling treatment "
+    "depends on the cause and severity diagnosis is made by examination and laboratory tests"
+).split()
+
+
+def synthetic_corpus(pages: int, words_per_page: int = 400, seed: int = 0):
+    """
+    Encyclopedia-like pages: one headline term per page, filler text and related terms
+    """
+    rng = random.Random(seed)
+    for page in range(pages):
+        term = TERMS[page % len(TERMS)]
+        words = [term.upper(), "."]
+        for _ in range(words_per_page):
+            words.append(rng.choice(TERMS) if rng.random() < 0.15 else rng.choice(FILLER))
+            if rng.random() < 0.08:
+                words.append(".")
+        yield Document(
+            page_content=" ".join(words).replace(" .", "."),
+            metadata={"source": f"synthetic/book{page // 500}.pdf", "page": page % 500}
+        )
+
+
+def make_queries(n: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [f"What is the treatment of {rng.choice(TERMS)} with {rng.choice(TERMS)}? ({i})" for i in range(n)]
+
+
+def summarize(latencies, elapsed: float) -> dict:
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "qps": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3)
+    }
+
+
+async def run_concurrent(call, items, concurrency: int) -> dict:
+    """
+    `concurrency` workers draining `items` through the coroutine `call`
+    """
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            item = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                await call(item)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"concurrency": concurrency, **summarize(latencies, time.perf_counter() - start), "errors": errors}
+
+
+# --------------------------------------------------
+# Stages
+# --------------------------------------------------
+def bench_ingestion(args, embedding, index_path: str) -> dict:
+    if args.data:
+        from project.load_data import DirectoryDocumentProcessor
+        pages = DirectoryDocumentProcessor(args.data, workers=args.loader_workers).lazy_load_documents()
+    else:
+        pages = synthetic_corpus(args.pages)
+
+    builder = IncrementalIndexBuilder(embedding, index_path, batch_size=args.batch_size,
+                                      model_name="fake", index_type=args.index_type)
+    start = time.perf_counter()
+    stats = builder.build(iter_split_documents(pages, args.chunk_size, args.chunk_overlap, args.chunk_strategy,
+                                               embedding=embedding))
+    seconds = time.perf_counter() - start
+    return {
+        "chunks": stats["chunks"],
+        "seconds": round(seconds, 3),
+        "chunks_per_sec": round(stats["chunks"] / seconds, 1) if seconds else 0.0,
+        "peak_rss_mb": stats.get("peak_rss_mb")
+    }
+
+
+async def bench_retrieval(retriever, queries, levels) -> list:
+    results = []
+    for level in levels:
+        result = await run_concurrent(retriever.ainvoke, queries, level)
+        results.append(result)
+        print(f"  retrieval clients={level:<3} {result['qps']:>8} q/s  p50={result['p50_ms']}ms "
+              f"p95={result['p95_ms']}ms p99={result['p99_ms']}ms")
+    return results
+
+
+async def bench_chat(server, queries, levels) -> list:
+    results = []
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def call(question):
+            response = await client.post("/api/chat", json={"message": question})
+            response.raise_for_status()
+
+        for level in levels:
+            result = await run_concurrent(call, queries, level)
+            results.append(result)
+            print(f"  /api/chat clients={level:<3} {result['qps']:>8} req/s p50={result['p50_ms']}ms "
+                  f"p95={result['p95_ms']}ms p99={result['p99_ms']}ms errors={result['errors']}")
+    return results
+
+
+# --------------------------------------------------
+# Regression check against a previous run
+# --------------------------------------------------
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for stage in ("retrieval", "chat"):
+        before = {r["concurrency"]: r for r in baseline.get(stage, [])}
+        for row in current.get(stage, []):
+            old = before.get(row["concurrency"])
+            if old is None:
+                continue
+            if row["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{stage} c={row['concurrency']} p95 {old['p95_ms']} -> {row['p95_ms']} ms")
+            if row["qps"] < old["qps"] * (1 - tolerance):
+                regressions.append(f"{stage} c={row['concurrency']} qps {old['qps']} -> {row['qps']}")
+    old_rate = baseline.get("ingestion", {}).get("chunks_per_sec")
+    new_rate = current["ingestion"]["chunks_per_sec"]
+    if old_rate and new_rate < old_rate * (1 - tolerance):
+        regressions.append(f"ingestion chunks/s {old_rate} -> {new_rate}")
+    return regressions
+
+
+async def main(args) -> int:
+    os.environ.setdefault("ANSWER_CACHE", "0")  # measure the chain, not the answer cache
+    os.environ.setdefault("LOG_PROMPT_TOKENS", "0")
+    import project.pipeline as pipeline
+
+    workdir = tempfile.mkdtemp(prefix="e2e_bench_")
+    index_path = os.path.join(workdir, "faiss_index")
+    embedding = DeterministicFakeEmbedding(size=args.dim)
+    try:
+        print("📊 Ingestion...")
+        ingestion = bench_ingestion(args, embedding, index_path)
+        print(f"  {ingestion['chunks']} chunks in {ingestion['seconds']}s ({ingestion['chunks_per_sec']} chunks/s)")
+
+        llm = StubChatModel(latency=args.llm_latency, token_delay=args.token_delay)
+        chain = pipeline.main_pipeline(llm=llm, embedding=embedding, index_path=index_path)
+        queries = make_queries(args.queries)
+
+        print("📊 Retrieval...")
+        retrieval = await bench_retrieval(pipeline.retriever, queries, args.concurrency)
+
+        print("📊 /api/chat...")
+        server = __import__(args.app)
+        server.chatbot = chain
+        server.persist_path = index_path
+        chat = await bench_chat(server, queries, args.concurrency)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "environment": {"python": platform.python_version(), "cpus": os.cpu_count(),
+                        "platform": platform.platform()},
+        "ingestion": ingestion,
+        "retrieval": retrieval,
+        "chat": chat
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"❌ Regression: {line}")
+        if regressions:
+            return 1
+        print("✅ No regression against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline end-to-end RAG benchmark")
+    parser.add_argument("--data", default=None, help="PDF file/directory instead of the synthetic corpus")
+    parser.add_argument("--pages", type=int, default=1000, help="synthetic corpus pages")
+    parser.add_argument("--loader-workers", type=int, default=1)
+    parser.add_argument("--chunk-strategy", default="recursive")
+    parser.add_argument("--chunk-size", type=int, default=None, help="default: the strategy's default")
+    parser.add_argument("--chunk-overlap", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--app", default="app", choices=["app", "main"])
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    parser.add_argument("--baseline", default=None, help="previous JSON run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,142 @@
+"""
+Local stub of the Groq chat-completions API, so Groqllm's connection
+pooling can be checked without network access.
+
+    python -m benchmarks.groq_stub            # connection-reuse check
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with self.server.lock:
+            self.server.requests += 1
+            failures = self.server.fail_next
+            self.server.fail_next = max(0, failures - 1)
+
+        if failures:
+            body = json.dumps({"error": {"message": "stub overloaded"}}).encode()
+            self.send_response(503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        time.sleep(self.server.latency)
+        body = json.dumps({
+            "id": f"stub-{self.server.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.server.answer},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class GroqStubServer:
+    """
+    Threaded HTTP server on 127.0.0.1 counting TCP connections and requests.
+    fail_next=N makes the next N requests answer 503 (to exercise retries).
+    """
+
+    def __init__(self, answer: str = "stub answer", latency: float = 0.0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+        self.httpd.fail_next = 0
+        self.httpd.answer = answer
+        self.httpd.latency = latency
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def connections(self) -> int:
+        return self.httpd.connections
+
+    @property
+    def requests(self) -> int:
+        return self.httpd.requests
+
+    def fail_next(self, count: int):
+        self.httpd.fail_next = count
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def check_connection_reuse(calls: int = 10) -> dict:
+    from project.chatmodel import Groqllm
+
+    with GroqStubServer() as server:
+        llm = Groqllm(api_key="stub-key", base_url=server.base_url, max_retries=2)
+        for _ in range(calls):
+            llm.invoke("ping")
+        sync_connections = server.connections
+
+        async def run_async():
+            for _ in range(calls):
+                await llm.ainvoke("ping")
+            await llm.aclose()
+
+        asyncio.run(run_async())
+        async_connections = server.connections - sync_connections
+
+        server.fail_next(1)
+        retry_llm = Groqllm(api_key="stub-key", base_url=server.base_url, max_retries=2)
+        answer = retry_llm.invoke("ping").content
+        retry_llm.close()
+
+        result = {
+            "calls": calls,
+            "sync_connections": sync_connections,
+            "async_connections": async_connections,
+            "answer_after_retry": answer,
+            "requests": server.requests
+        }
+
+    assert sync_connections == 1, result
+    assert async_connections == 1, result
+    assert answer == "stub answer", result
+    return result
+
+
+if __name__ == "__main__":
+    print(json.dumps(check_connection_reuse(), indent=2))
+    print("✅ Groqllm reuses one pooled connection")
@@ -0,0 +1,76 @@
+"""
+Load test for POST /api/chat against a stubbed LLM (no network, no model weights).
+
+    python -m benchmarks.load_test --app app --requests 64 --concurrency 1 2 4 8 16
+
+Shows throughput scaling with the number of concurrent clients; with
+CHAT_MAX_CONCURRENCY below the client count the excess is queued or rejected (429).
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import time
+
+import httpx
+
+from benchmarks.stubs import stub_chain
+
+
+async def run_level(app, concurrency: int, total: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    statuses = {}
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(f"What is therapeutic abortion? ({i})")
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+        async def worker():
+            while not queue.empty():
+                question = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.post("/api/chat", json={"message": question})
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+        "statuses": statuses
+    }
+
+
+async def main(args):
+    server = importlib.import_module(args.app)
+    server.chatbot = stub_chain(llm_latency=args.llm_latency)
+
+    results = []
+    for level in args.concurrency:
+        result = await run_level(server.app, level, args.requests)
+        results.append(result)
+        print(f"clients={level:<3} {result['throughput_rps']:>8} req/s  "
+              f"p50={result['p50_ms']}ms  statuses={result['statuses']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent load test for /api/chat")
+    parser.add_argument("--app", default="app", choices=["app", "main"])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--output", default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,114 @@
+"""
+Parity and speed of the ONNX (int8) embedding backend against the torch
+SentenceTransformer.
+
+    python -m project.embed.onnx_backend export --output models/all-MiniLM-L6-v2-onnx
+    python -m benchmarks.onnx_parity --onnx-path models/all-MiniLM-L6-v2-onnx --output onnx.json
+
+Exits 1 when the cosine similarity of any sentence's two vectors falls below
+--tolerance. Also reports per-query latency, batch throughput, import time
+and model load time of each backend.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.e2e_benchmark import make_queries, synthetic_corpus
+from project.embed import DEFAULT_MODEL_NAME
+
+
+IMPORTS = {
+    "torch": "import sentence_transformers",
+    "onnx": "import onnxruntime, tokenizers",
+}
+
+
+def import_seconds(backend: str) -> float:
+    """
+    Cold import time in a fresh interpreter
+    """
+    code = f"import time; s = time.perf_counter(); {IMPORTS[backend]}; print(time.perf_counter() - s)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return round(float(out.stdout.strip()), 3)
+
+
+def load_engine(backend: str, args):
+    start = time.perf_counter()
+    if backend == "onnx":
+        from project.embed.onnx_backend import OnnxEmbeddingEngine
+        engine = OnnxEmbeddingEngine(args.onnx_path, quantized=not args.fp32)
+    else:
+        from project.embed import EmbeddingEngine
+        engine = EmbeddingEngine(args.model)
+    return engine, round(time.perf_counter() - start, 3)
+
+
+def speed(engine, queries, passages, batch_size: int) -> dict:
+    engine.embed_query(queries[0])  # warm-up
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        engine.embed_query(query)
+        latencies.append(time.perf_counter() - start)
+    ms = np.array(latencies) * 1000
+
+    start = time.perf_counter()
+    engine.encode(passages, batch_size=batch_size)
+    seconds = time.perf_counter() - start
+    return {
+        "query_p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "query_p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "passages_per_sec": round(len(passages) / seconds, 1)
+    }
+
+
+def cosine_parity(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosine = (reference * candidate).sum(axis=1)
+    return {
+        "min_cosine": round(float(cosine.min()), 5),
+        "mean_cosine": round(float(cosine.mean()), 5)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ONNX vs torch embedding parity and latency")
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--onnx-path", default="models/all-MiniLM-L6-v2-onnx")
+    parser.add_argument("--fp32", action="store_true", help="use model.onnx instead of model_int8.onnx")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--passages", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--tolerance", type=float, default=0.98, help="minimum cosine(torch, onnx)")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    queries = make_queries(args.queries)
+    passages = [doc.page_content[:1500] for doc in synthetic_corpus(args.passages)]
+    sample = queries[:100] + passages[:100]
+
+    report = {"model": args.model, "onnx_path": args.onnx_path, "quantized": not args.fp32, "backends": {}}
+    vectors = {}
+    for backend in ("torch", "onnx"):
+        engine, load_seconds = load_engine(backend, args)
+        vectors[backend] = np.asarray(engine.encode(sample, batch_size=args.batch_size), dtype="float32")
+        report["backends"][backend] = {
+            "import_seconds": import_seconds(backend),
+            "load_seconds": load_seconds,
+            **speed(engine, queries, passages, args.batch_size)
+        }
+        print(f"{backend:<6} {report['backends'][backend]}")
+
+    report["parity"] = cosine_parity(vectors["torch"], vectors["onnx"])
+    ok = report["parity"]["min_cosine"] >= args.tolerance
+    print(f"{'✅' if ok else '❌'} cosine(torch, onnx): {report['parity']} (tolerance {args.tolerance})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,114 @@
+"""
+Offline stand-ins for the network / model parts of the chain,
+used by the load tests and benchmarks.
+"""
+import asyncio
+import hashlib
+import time
+from typing import Any, List
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForLLMRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.retrievers import BaseRetriever
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Deterministic chat model: the answer depends only on the prompt, and
+    latency is simulated with a fixed delay (plus a per-token delay when streaming).
+    """
+
+    latency: float = 0.2
+    token_delay: float = 0.0
+    num_words: int = 30
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    def _answer(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(m.content) for m in messages)
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+        words = prompt.split()[-self.num_words:]
+        return f"[{digest}] " + " ".join(words)
+
+    def _generate(self, messages: List[BaseMessage], stop: List[str] | None = None,
+                  run_manager: CallbackManagerForLLMRun | None = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(messages)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: List[str] | None = None,
+                         run_manager: AsyncCallbackManagerForLLMRun | None = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(messages)))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        for token in self._answer(messages).split(" "):
+            time.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        for token in self._answer(messages).split(" "):
+            await asyncio.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token + " "))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+class StubRetriever(BaseRetriever):
+    """
+    Returns the first k fixture documents after a simulated search delay
+    """
+
+    documents: List[Document]
+    k: int = 3
+    latency: float = 0.01
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        time.sleep(self.latency)
+        return self.documents[:self.k]
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        await asyncio.sleep(self.latency)
+        return self.documents[:self.k]
+
+
+def stub_documents(n: int = 10) -> List[Document]:
+    return [
+        Document(
+            page_content=f"Fixture chunk {i}: therapeutic abortion is the termination of a pregnancy "
+                         f"for medical reasons (entry {i}).",
+            metadata={"source": "fixture.pdf", "page": i}
+        )
+        for i in range(n)
+    ]
+
+
+def stub_chain(llm_latency: float = 0.2, retrieval_latency: float = 0.01, token_delay: float = 0.0):
+    """
+    Same chain shape as main_pipeline() with the retriever and ChatGroq stubbed
+    """
+    from langchain_classic.chains.combine_documents import create_stuff_documents_chain
+    from langchain_classic.chains.retrieval import create_retrieval_chain
+    from project.prompt import template
+
+    llm = StubChatModel(latency=llm_latency, token_delay=token_delay)
+    retriever = StubRetriever(documents=stub_documents(), latency=retrieval_latency)
+    combine_chain = create_stuff_documents_chain(llm, template())
+    return create_retrieval_chain(retriever, combine_chain)
@@ -1,22 +1,27 @@
 ####### index.html
 ####### style.css
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from pydantic import BaseModel
 import uvicorn
-import time
 import os
 import sys
 
 # Add for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from project.serving.api import lifespan, router
+
 app = FastAPI(
     title="🤖 Medical ChatApp",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan("ML Chatbot Server", [
+        "🌐 Server: http://localhost:8000",
+        "📚 API docs: http://localhost:8000/docs",
+        "💬 Chat UI: http://localhost:8000/"
+    ])
 )
 
 # Enable CORS
@@ -28,40 +33,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Request/Response models
-class ChatRequest(BaseModel):
-    message: str
-
-class ChatResponse(BaseModel):
-    answer: str
-    processing_time: float
-    success: bool
-
-# Global chatbot
-chatbot = None
-
-@app.on_event("startup")
-def startup():
-    """Load chatbot on startup"""
-    global chatbot
-    print("🚀 Starting ML Chatbot Server...")
-    
-    try:
-        # Try to import pipeline
-        try:
-            from project.pipeline import main_pipeline
-        except ImportError:
-            from project.pipeline import main_pipeline
-        
-        chatbot = main_pipeline()
-        print("✅ Chatbot loaded successfully!")
-    except Exception as e:
-        print(f"❌ Failed to load chatbot: {e}")
-        chatbot = None
-    
-    print(f"🌐 Server: http://localhost:8000")
-    print(f"📚 API docs: http://localhost:8000/docs")
-    print(f"💬 Chat UI: http://localhost:8000/")
+# /api/* and /metrics (project.serving.api)
+app.include_router(router)
 
 # ---------------------------
 # SERVE STATIC FILES
@@ -83,53 +56,5 @@ if os.path.exists(frontend_dir):
 else:
     print("⚠️ Frontend folder not found")
 
-# ---------------------------
-# API ENDPOINTS
-# ---------------------------
-
-@app.get("/api")
-async def api_info():
-    """API information"""
-    return {
-        "name": "Medical ChatAPP API",
-        "version": "1.0.0",
-        "endpoints": {
-            "chat": "POST /api/chat",
-            "health": "GET /api/health"
-        },
-        "chatbot_loaded": chatbot is not None
-    }
-
-@app.get("/api/health")
-async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy" if chatbot else "degraded",
-        "chatbot_loaded": chatbot is not None,
-        "timestamp": time.time()
-    }
-
-@app.post("/api/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
-    """Chat with the ML chatbot"""
-    start_time = time.time()
-    
-    if not chatbot:
-        return ChatResponse(
-            answer="Chatbot not loaded. Please check server logs.",
-            processing_time=time.time() - start_time,
-            success=False
-        )
-    
-    try:
-        response = chatbot.invoke({"input": request.message})
-        return ChatResponse(
-            answer=response["answer"],
-            processing_time=round(time.time() - start_time, 3),
-            success=True
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
-
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,296 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+def normalize_question(text: str) -> str:
+    """
+    Lowercase, drop punctuation and collapse whitespace
+    ("What is Abortion, therapeutic?" -> "what is abortion therapeutic")
+    """
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def index_version(persist_path: str = "faiss_index") -> str:
+    """
+    Fingerprint of the files in the index directory; changes on every rebuild
+    """
+    if not os.path.isdir(persist_path):
+        return "missing"
+    parts = []
+    for name in sorted(os.listdir(persist_path)):
+        stat = os.stat(os.path.join(persist_path, name))
+        parts.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
+class SemanticAnswerCache:
+    """
+    Two-tier answer cache in front of the retrieval chain.
+
+    1. exact tier      normalized question -> answer
+    2. semantic tier   cosine(query, cached question) >= threshold -> answer
+
+    Entries are evicted LRU beyond max_entries and expire after ttl seconds.
+    The whole cache is dropped when the index version changes (faiss_index rebuilt).
+    """
+
+    def __init__(self, embedding=None, threshold: float = 0.92, max_entries: int = 2048,
+                 ttl: float = 86400, persist_path: str | None = None,
+                 index_path: str = "faiss_index", version_check_interval: float = 5.0):
+        self.embedding = embedding
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.index_path = index_path
+        self.version_check_interval = version_check_interval
+
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+        self.version = index_version(index_path)
+        self.version_checked = time.time()
+        self.metrics = {"exact_hits": 0, "semantic_hits": 0, "misses": 0,
+                        "evictions": 0, "expired": 0, "invalidations": 0}
+
+        if persist_path and os.path.exists(persist_path):
+            self.load()
+
+    # --------------------------------------------------
+    # Lookup
+    # --------------------------------------------------
+    def _check_version(self):
+        now = time.time()
+        if now - self.version_checked < self.version_check_interval:
+            return
+        self.version_checked = now
+        current = index_version(self.index_path)
+        if current != self.version:
+            self.invalidate(current)
+
+    def _expired(self, entry: dict) -> bool:
+        return self.ttl is not None and time.time() - entry["created"] > self.ttl
+
+    def get_exact(self, question: str):
+        key = normalize_question(question)
+        with self.lock:
+            self._check_version()
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry):
+                del self.entries[key]
+                self.metrics["expired"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.metrics["exact_hits"] += 1
+            return entry
+
+    def get_similar(self, vector):
+        """
+        Best cached entry whose question embedding is within the threshold
+        """
+        query = _unit(vector)
+        with self.lock:
+            keys = [k for k, e in self.entries.items() if e.get("vector") is not None and not self._expired(e)]
+            if not keys:
+                self.metrics["misses"] += 1
+                return None
+            matrix = np.stack([self.entries[k]["vector"] for k in keys])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.metrics["misses"] += 1
+                return None
+            key = keys[best]
+            self.entries.move_to_end(key)
+            self.metrics["semantic_hits"] += 1
+            return self.entries[key]
+
+    def get(self, question: str):
+        """
+        Return (entry, tier, query_vector); the vector is reused by put() on a miss
+        """
+        entry = self.get_exact(question)
+        if entry is not None:
+            return entry, "exact", None
+        if self.embedding is None:
+            with self.lock:
+                self.metrics["misses"] += 1
+            return None, None, None
+        vector = self.embedding.embed_query(question)
+        entry = self.get_similar(vector)
+        return entry, ("semantic" if entry is not None else None), vector
+
+    async def aget(self, question: str):
+        entry = self.get_exact(question)
+        if entry is not None:
+            return entry, "exact", None
+        if self.embedding is None:
+            with self.lock:
+                self.metrics["misses"] += 1
+            return None, None, None
+        vector = await self.embedding.aembed_query(question)
+        entry = self.get_similar(vector)
+        return entry, ("semantic" if entry is not None else None), vector
+
+    # --------------------------------------------------
+    # Insert / evict
+    # --------------------------------------------------
+    def put(self, question: str, answer: str, context: List[Document] | None = None, vector=None):
+        key = normalize_question(question)
+        if vector is None and self.embedding is not None:
+            vector = self.embedding.embed_query(question)
+        entry = {
+            "question": question,
+            "answer": answer,
+            "context": [{"page_content": d.page_content, "metadata": d.metadata} for d in context or []],
+            "vector": _unit(vector) if vector is not None else None,
+            "created": time.time()
+        }
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.metrics["evictions"] += 1
+
+    def invalidate(self, version: str | None = None):
+        with self.lock:
+            self.entries.clear()
+            self.version = version or index_version(self.index_path)
+            self.metrics["invalidations"] += 1
+
+    def stats(self) -> dict:
+        hits = self.metrics["exact_hits"] + self.metrics["semantic_hits"]
+        total = hits + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "size": len(self.entries),
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "threshold": self.threshold,
+            "index_version": self.version
+        }
+
+    # --------------------------------------------------
+    # Persistence
+    # --------------------------------------------------
+    def save(self, path: str | None = None):
+        path = path or self.persist_path
+        if not path:
+            return
+        with self.lock:
+            data = {
+                "version": self.version,
+                "entries": [
+                    {**e, "key": k, "vector": e["vector"].tolist() if e["vector"] is not None else None}
+                    for k, e in self.entries.items()
+                ]
+            }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str | None = None):
+        path = path or self.persist_path
+        with open(path) as f:
+            data = json.load(f)
+        # Answers cached against another index build are stale
+        if data.get("version") != self.version:
+            return
+        with self.lock:
+            for item in data["entries"]:
+                key = item.pop("key")
+                if item["vector"] is not None:
+                    item["vector"] = np.asarray(item["vector"], dtype="float32")
+                if not self._expired(item):
+                    self.entries[key] = item
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype="float32")
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class CachedRetrievalChain:
+    """
+    Wraps the retrieval chain with a SemanticAnswerCache while keeping
+    its invoke / ainvoke / astream interface ({"input"} -> {"context", "answer"}).
+
+    Requests with a configurable override (e.g. a source filter) bypass the cache.
+    """
+
+    def __init__(self, chain, cache: SemanticAnswerCache):
+        self.chain = chain
+        self.cache = cache
+
+    @staticmethod
+    def _from_entry(question: str, entry: dict, tier: str) -> dict:
+        return {
+            "input": question,
+            "context": [Document(**doc) for doc in entry["context"]],
+            "answer": entry["answer"],
+            "cache": tier
+        }
+
+    @staticmethod
+    def _bypass(config: dict | None) -> bool:
+        return bool(config and config.get("configurable"))
+
+    def invoke(self, inputs: dict, config: dict | None = None) -> dict:
+        if self._bypass(config):
+            return self.chain.invoke(inputs, config=config)
+        question = inputs["input"]
+        entry, tier, vector = self.cache.get(question)
+        if entry is not None:
+            return self._from_entry(question, entry, tier)
+
+        response = self.chain.invoke(inputs, config=config)
+        self.cache.put(question, response["answer"], response.get("context"), vector)
+        return response
+
+    async def ainvoke(self, inputs: dict, config: dict | None = None) -> dict:
+        if self._bypass(config):
+            return await self.chain.ainvoke(inputs, config=config)
+        question = inputs["input"]
+        entry, tier, vector = await self.cache.aget(question)
+        if entry is not None:
+            return self._from_entry(question, entry, tier)
+
+        response = await self.chain.ainvoke(inputs, config=config)
+        self.cache.put(question, response["answer"], response.get("context"), vector)
+        return response
+
+    async def astream(self, inputs: dict, config: dict | None = None):
+        if self._bypass(config):
+            async for chunk in self.chain.astream(inputs, config=config):
+                yield chunk
+            return
+        question = inputs["input"]
+        entry, tier, vector = await self.cache.aget(question)
+        if entry is not None:
+            cached = self._from_entry(question, entry, tier)
+            yield {"input": question}
+            yield {"context": cached["context"]}
+            yield {"answer": cached["answer"]}
+            return
+
+        context, answer = [], []
+        async for chunk in self.chain.astream(inputs, config=config):
+            if "context" in chunk:
+                context = chunk["context"]
+            if "answer" in chunk:
+                answer.append(chunk["answer"])
+            yield chunk
+        self.cache.put(question, "".join(answer), context, vector)
@@ -1,5 +1,7 @@
 from langchain_groq import ChatGroq
 from dotenv import load_dotenv
+import httpx
+import threading
 import os
 
 load_dotenv()
@@ -7,26 +9,87 @@ groq_api_key = os.getenv('GROQ_API_KEY')
 
 
 class Groqllm:
-    def __init__(self, model="llama-3.1-8b-instant", api_key=None, max_tokens=500):
+    """
+    Owns one long-lived ChatGroq with pooled sync/async HTTP clients,
+    so every query reuses the same keep-alive connections.
+
+    timeout          request timeout in seconds        (GROQ_TIMEOUT)
+    max_retries      retries with exponential backoff  (GROQ_MAX_RETRIES)
+    keepalive_expiry idle seconds before a pooled connection is closed (GROQ_KEEPALIVE_EXPIRY)
+    max_connections  pool size                         (GROQ_MAX_CONNECTIONS)
+    """
+
+    def __init__(self, model="llama-3.1-8b-instant", api_key=None, max_tokens=500,
+                 base_url=None, timeout=None, connect_timeout=5.0, max_retries=None,
+                 keepalive_expiry=None, max_connections=None, callbacks=None):
         self.model = model
         self.api_key = api_key
         self.max_tokens = max_tokens
-    
+        self.base_url = base_url or os.getenv("GROQ_BASE_URL")
+        self.timeout = timeout or float(os.getenv("GROQ_TIMEOUT", "30"))
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("GROQ_MAX_RETRIES", "2"))
+        self.keepalive_expiry = keepalive_expiry or float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "60"))
+        self.max_connections = max_connections or int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+        self.callbacks = callbacks
+
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _http_options(self) -> dict:
+        return {
+            "timeout": httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=self.keepalive_expiry
+            )
+        }
+
     def call(self):
+        """
+        Return the shared ChatGroq, building it (and its connection pools) once
+        """
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    options = {}
+                    if self.base_url:
+                        options["base_url"] = self.base_url
+                    self._client = ChatGroq(
+                        model=self.model,
+                        api_key=self.api_key,
+                        max_tokens=self.max_tokens,
+                        timeout=self.timeout,
+                        max_retries=self.max_retries,
+                        http_client=httpx.Client(**self._http_options()),
+                        http_async_client=httpx.AsyncClient(**self._http_options()),
+                        callbacks=self.callbacks,
+                        **options
+                    )
+        return self._client
 
-        model = ChatGroq(
-            model=self.model,
-            api_key=self.api_key,
-            max_tokens=self.max_tokens
-        )
-        return model
-    
-    def invoke(self,query:str):
+    def invoke(self, query: str):
         llm = self.call()
         response = llm.invoke(query)
 
         return response
-    
+
+    async def ainvoke(self, query: str):
+        llm = self.call()
+        response = await llm.ainvoke(query)
+
+        return response
+
+    def close(self):
+        if self._client is not None:
+            self._client.http_client.close()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.http_async_client.aclose()
+            self._client.http_client.close()
+
 
 if __name__ == "__main__":
     llm = Groqllm(api_key=groq_api_key)
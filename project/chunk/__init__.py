@@ -1,35 +1,86 @@
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from project.chunk.strategies import DEFAULT_SIZES, get_chunker
 from project.load_data import DocumentProcessor
+from typing import Iterable, Iterator
+import hashlib
+import os
+
+
+# Page metadata kept on every chunk (PyPDFLoader adds producer, creator, ... as well)
+KEEP_METADATA = ("source", "page", "page_label")
+
+
+def content_hash(source: str, text: str) -> str:
+    """
+    Stable chunk id: sha256 of its source and text
+    """
+    return hashlib.sha256(f"{source}\n{text}".encode()).hexdigest()
+
+
+def chunking_config(strategy: str | None = None, chunk_size: int | None = None,
+                    chunk_overlap: int | None = None) -> dict:
+    """
+    Resolved chunking settings: arguments, then CHUNK_STRATEGY / CHUNK_SIZE /
+    CHUNK_OVERLAP, then the strategy's defaults
+    """
+    strategy = strategy or os.getenv("CHUNK_STRATEGY", "recursive")
+    default_size, default_overlap = DEFAULT_SIZES.get(strategy, DEFAULT_SIZES["recursive"])
+    if chunk_size is None:
+        chunk_size = int(os.getenv("CHUNK_SIZE", default_size))
+    if chunk_overlap is None:
+        chunk_overlap = int(os.getenv("CHUNK_OVERLAP", default_overlap))
+    return {"strategy": strategy, "chunk_size": chunk_size, "chunk_overlap": chunk_overlap}
+
+
+def iter_split_documents(documents: Iterable[Document], chunk_size: int | None = None,
+                         chunk_overlap: int | None = None, strategy: str | None = None,
+                         embedding=None) -> Iterator[Document]:
+    """
+    Split pages into chunks that keep source, page, their character offset
+    in the page (start_index), their position in the page (chunk), the
+    section heading (sentence strategy) and content_hash.
+
+    strategy is one of project.chunk.strategies.CHUNK_STRATEGIES; the
+    semantic strategy needs the embedding model.
+    """
+    config = chunking_config(strategy, chunk_size, chunk_overlap)
+    chunker = get_chunker(config["strategy"], config["chunk_size"], config["chunk_overlap"], embedding)
+
+    source = section = None
+    for doc in documents:
+        metadata = {key: doc.metadata[key] for key in KEEP_METADATA if key in (doc.metadata or {})}
+        if metadata.get("source") != source:
+            source, section = metadata.get("source"), None
+        chunks = chunker.split(doc.page_content, section)
+
+        for idx, chunk in enumerate(chunks):
+            chunk_metadata = dict(metadata, start_index=chunk.start_index, chunk=idx,
+                                  content_hash=content_hash(metadata.get("source", ""), chunk.text))
+            if chunk.section:
+                chunk_metadata["section"] = chunk.section
+            yield Document(page_content=chunk.text, metadata=chunk_metadata)
+        if chunks:
+            # Pages often start in the middle of the previous page's section
+            section = chunks[-1].section
 
 
 class SplitterDocumentProcessor:
-    def __init__(self,documents,chunk_size=2000,chunk_overlap=200):
+    def __init__(self, documents, chunk_size=None, chunk_overlap=None, strategy=None, embedding=None):
         self.documents = documents
-        self.chunk_size = chunk_size
-        self.chunk_overlap = chunk_overlap
-        
+        self.config = chunking_config(strategy, chunk_size, chunk_overlap)
+        self.chunk_size = self.config["chunk_size"]
+        self.chunk_overlap = self.config["chunk_overlap"]
+        self.strategy = self.config["strategy"]
+        self.embedding = embedding
+
     def split_doc(self):
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap
-        )
-
-        tests = []
-        for doc in self.documents:
-            #print("Original document length:", len(doc.page_content))
-            chunks = text_splitter.split_text(doc.page_content)
-
-            for idx,chunk in enumerate(chunks):
-                #print(f"Chunk {idx} length:", len(chunk))
-                chunk_doc = Document(page_content=chunk)
-                tests.append(chunk_doc)
-        
-        return tests
-    
+        return list(iter_split_documents(self.documents, self.chunk_size, self.chunk_overlap,
+                                         self.strategy, self.embedding))
+
 
 if __name__ == '__main__':
     processor = DocumentProcessor("project/data/Medical_book.pdf")
     docs = processor.load_documents()
-    split = SplitterDocumentProcessor(documents=docs, chunk_size=1000, chunk_overlap=200)
-    texts = split.split_doc()
\ No newline at end of file
+    split = SplitterDocumentProcessor(documents=docs)
+    texts = split.split_doc()
+    print(f"Split into {len(texts)} chunks ({split.config})")
@@ -0,0 +1,240 @@
+"""
+Chunking strategies. Every chunker turns one page of text into Chunks
+(text, start_index in the page, section heading); chunk_size is counted
+in the strategy's unit.
+
+    recursive  RecursiveCharacterTextSplitter, size in characters (default)
+    token      recursive splitting, size in tokens (tiktoken, else ~4 chars/token)
+    sentence   sentence packing that starts a new chunk at encyclopedia
+               headings (Definition, Causes and symptoms, Treatment, ...)
+    semantic   sentence packing that cuts where the embeddings of
+               neighbouring sentences diverge most
+"""
+import re
+from typing import List, NamedTuple
+
+import numpy as np
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+# Defaults per strategy: (chunk_size, chunk_overlap)
+DEFAULT_SIZES = {
+    "recursive": (2000, 200),
+    "token": (256, 32),  # the MiniLM embedder reads at most 256 word pieces
+    "sentence": (2000, 200),
+    "semantic": (2000, 0),
+}
+
+# Section headings of the Gale Encyclopedia of Medicine entries
+MEDICAL_SECTIONS = frozenset(
+    s.lower() for s in (
+        "Definition", "Description", "Causes and symptoms", "Causes", "Symptoms", "Diagnosis",
+        "Treatment", "Alternative treatment", "Prognosis", "Prevention", "Resources", "Key terms",
+        "Purpose", "Precautions", "Preparation", "Aftercare", "Risks", "Normal results",
+        "Abnormal results", "Side effects", "Interactions", "Books", "Periodicals", "Organizations", "Other"
+    )
+)
+
+SENTENCE_RE = re.compile(r"\S.*?(?:[.!?]+(?=\s|$)|$)", re.S)
+LINE_RE = re.compile(r"[^\n]*\n?")
+
+
+class Chunk(NamedTuple):
+    text: str
+    start_index: int
+    section: str | None = None
+
+
+class RecursiveChunker:
+    def __init__(self, chunk_size: int = 2000, chunk_overlap: int = 200, length_function=len):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=length_function,
+            add_start_index=True
+        )
+
+    def split(self, text: str, section: str | None = None) -> List[Chunk]:
+        return [Chunk(doc.page_content, doc.metadata["start_index"])
+                for doc in self.splitter.create_documents([text])]
+
+
+class TokenChunker(RecursiveChunker):
+    def __init__(self, chunk_size: int = 256, chunk_overlap: int = 32, encoding: str = "cl100k_base"):
+        from project.prompt.context import TokenCounter
+
+        super().__init__(chunk_size, chunk_overlap, length_function=TokenCounter(encoding).count)
+
+
+# --------------------------------------------------
+# Sentence units
+# --------------------------------------------------
+def is_heading(line: str) -> bool:
+    """
+    Encyclopedia section names and short all-caps lines (entry titles, KEY TERMS)
+    """
+    line = line.strip()
+    if not 3 <= len(line) <= 60 or line[-1] in ".,;:":
+        return False
+    if line.lower() in MEDICAL_SECTIONS:
+        return True
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 3 and all(c.isupper() for c in letters)
+
+
+def sentence_spans(text: str, offset: int = 0) -> List[tuple]:
+    return [(offset + m.start(), offset + m.end()) for m in SENTENCE_RE.finditer(text)]
+
+
+def units(text: str, headings: bool = True) -> List[tuple]:
+    """
+    (start, end, is_heading) sentence spans of a page; headings are kept as their own unit
+    """
+    if not headings:
+        return [(start, end, False) for start, end in sentence_spans(text)]
+
+    result = []
+    block_start = None
+    pos = 0
+    for match in LINE_RE.finditer(text):
+        line = match.group()
+        if not line:
+            break
+        if is_heading(line):
+            if block_start is not None:
+                result.extend((s, e, False) for s, e in sentence_spans(text[block_start:pos], block_start))
+                block_start = None
+            start = pos + len(line) - len(line.lstrip())
+            result.append((start, start + len(line.strip()), True))
+        elif block_start is None:
+            block_start = pos
+        pos = match.end()
+    if block_start is not None:
+        result.extend((s, e, False) for s, e in sentence_spans(text[block_start:], block_start))
+    return result
+
+
+class SentenceChunker:
+    """
+    Greedy packing of whole sentences up to chunk_size characters. A
+    heading always starts a new chunk and is recorded as its section, so
+    "Treatment" text does not bleed into the "Diagnosis" chunk; overlap
+    repeats trailing sentences of the same section only. Text shorter than
+    min_chars before a heading (an entry title) is kept with it.
+    """
+
+    def __init__(self, chunk_size: int = 2000, chunk_overlap: int = 200, headings: bool = True,
+                 min_chars: int = 100):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.headings = headings
+        self.min_chars = min_chars
+        self.fallback = RecursiveChunker(chunk_size, chunk_overlap)
+
+    def _overlap(self, current: List[tuple]) -> List[tuple]:
+        carried = []
+        size = 0
+        for unit in reversed(current):
+            size += unit[1] - unit[0]
+            if size > self.chunk_overlap or unit[2]:
+                break
+            carried.insert(0, unit)
+        return carried if len(carried) < len(current) else []
+
+    def _boundaries(self, text: str, spans: List[tuple]) -> List[bool]:
+        """
+        True before unit i when a chunk must end there (besides headings and size)
+        """
+        return [False] * len(spans)
+
+    def split(self, text: str, section: str | None = None) -> List[Chunk]:
+        spans = units(text, self.headings)
+        cuts = self._boundaries(text, spans)
+        chunks = []
+        current = []
+
+        def flush():
+            if current:
+                start, end = current[0][0], current[-1][1]
+                chunks.append(Chunk(text[start:end], start, section))
+
+        for i, unit in enumerate(spans):
+            start, end, heading = unit
+            if end - start > self.chunk_size:
+                # One oversized sentence: cut it like the recursive splitter
+                flush()
+                current = []
+                chunks.extend(Chunk(c.text, start + c.start_index, section)
+                              for c in self.fallback.split(text[start:end]))
+                continue
+            if heading:
+                if current and current[-1][1] - current[0][0] >= self.min_chars:
+                    flush()
+                    current = []
+                section = text[start:end]
+            elif current and (cuts[i] or end - current[0][0] > self.chunk_size):
+                flush()
+                current = self._overlap(current) if not cuts[i] else []
+                while current and end - current[0][0] > self.chunk_size:
+                    current.pop(0)
+            current.append(unit)
+        flush()
+        return chunks
+
+
+class SemanticChunker(SentenceChunker):
+    """
+    Sentence packing that also cuts where adjacent sentences are least
+    similar: cosine distances between consecutive sentence windows above the
+    breakpoint_percentile-th percentile of the page become chunk boundaries.
+    """
+
+    def __init__(self, embedding, chunk_size: int = 2000, chunk_overlap: int = 0,
+                 breakpoint_percentile: float = 90, window: int = 1):
+        super().__init__(chunk_size, chunk_overlap, headings=False)
+        if embedding is None:
+            raise ValueError("The semantic chunking strategy needs an embedding model")
+        self.embedding = embedding
+        self.breakpoint_percentile = breakpoint_percentile
+        self.window = window
+
+    def _boundaries(self, text: str, spans: List[tuple]) -> List[bool]:
+        cuts = [False] * len(spans)
+        if len(spans) < 3:
+            return cuts
+        windows = [
+            text[spans[max(0, i - self.window)][0]:spans[min(len(spans) - 1, i + self.window)][1]]
+            for i in range(len(spans))
+        ]
+        vectors = np.asarray(self.embedding.embed_documents(windows), dtype="float32")
+        vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        distances = 1.0 - (vectors[:-1] * vectors[1:]).sum(axis=1)
+        threshold = np.percentile(distances, self.breakpoint_percentile)
+        for i, distance in enumerate(distances, start=1):
+            cuts[i] = bool(distance > threshold)
+        return cuts
+
+
+CHUNK_STRATEGIES = tuple(DEFAULT_SIZES)
+
+
+def get_chunker(strategy: str = "recursive", chunk_size: int | None = None, chunk_overlap: int | None = None,
+                embedding=None):
+    """
+    Chunker for one of CHUNK_STRATEGIES; missing sizes use the strategy defaults
+    """
+    if strategy not in DEFAULT_SIZES:
+        raise ValueError(f"Unknown chunking strategy '{strategy}', expected one of {CHUNK_STRATEGIES}")
+    default_size, default_overlap = DEFAULT_SIZES[strategy]
+    chunk_size = chunk_size or default_size
+    chunk_overlap = default_overlap if chunk_overlap is None else chunk_overlap
+
+    if strategy == "token":
+        return TokenChunker(chunk_size, chunk_overlap)
+    if strategy == "sentence":
+        return SentenceChunker(chunk_size, chunk_overlap)
+    if strategy == "semantic":
+        return SemanticChunker(embedding, chunk_size, chunk_overlap)
+    return RecursiveChunker(chunk_size, chunk_overlap)
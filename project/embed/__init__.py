@@ -1,54 +1,115 @@
-from typing import List, Any
+from typing import List, Any, Iterable, Iterator
+import os
+import threading
 
 from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.embeddings import Embeddings
 from langchain_core.documents import Document
-from langchain_huggingface import HuggingFaceEmbeddings
 
-from sentence_transformers import SentenceTransformer
 from project.load_data import DocumentProcessor
+from project.chunk import chunking_config, iter_split_documents
+
+
+DEFAULT_MODEL_NAME = "sentence-transformers/all-MiniLM-l6-v2"
+
+
+class EmbeddingEngine(Embeddings):
+    """
+    One SentenceTransformer shared by the LangChain interface
+    (embed_documents / embed_query) and raw batch encode().
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, device: str | None = None):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.device = device
+        self.client = SentenceTransformer(model_name, device=device)
+
+    def encode(self, texts: List[str], **kwargs):
+        return self.client.encode(texts, **kwargs)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = [text.replace("\n", " ") for text in texts]
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+# --------------------------------------------------
+# Process-wide model registry
+# --------------------------------------------------
+_engines: dict = {}
+_engines_lock = threading.Lock()
+
+
+def get_embedding_engine(model_name: str = DEFAULT_MODEL_NAME, device: str | None = None,
+                         backend: str | None = None) -> Embeddings:
+    """
+    Return the shared engine for model_name, loading the weights only once per process.
+
+    backend (EMBEDDING_BACKEND): "torch" (SentenceTransformer, default) or
+    "onnx" (int8 ONNX export in ONNX_MODEL_PATH, see project.embed.onnx_backend)
+    """
+    backend = backend or os.getenv("EMBEDDING_BACKEND", "torch")
+    key = (model_name, device, backend)
+    engine = _engines.get(key)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(key)
+            if engine is None:
+                if backend == "onnx":
+                    from project.embed.onnx_backend import DEFAULT_ONNX_PATH, OnnxEmbeddingEngine
+                    engine = OnnxEmbeddingEngine(
+                        os.getenv("ONNX_MODEL_PATH", DEFAULT_ONNX_PATH),
+                        model_name=model_name,
+                        quantized=os.getenv("ONNX_QUANTIZED", "1") != "0"
+                    )
+                elif backend == "torch":
+                    engine = EmbeddingEngine(model_name, device=device)
+                else:
+                    raise ValueError(f"Unknown embedding backend '{backend}', expected 'torch' or 'onnx'")
+                _engines[key] = engine
+    return engine
 
 
 class EmbeddingPipeline:
     def __init__(
         self,
-        model_name: str = "sentence-transformers/all-MiniLM-l6-v2",
-        chunk_size: int = 2000,
-        chunk_overlap: int = 200,
-        persist_path: str = "faiss_index"
+        model_name: str = DEFAULT_MODEL_NAME,
+        chunk_size: int | None = None,
+        chunk_overlap: int | None = None,
+        persist_path: str = "faiss_index",
+        chunk_strategy: str | None = None
     ):
-        # SentenceTransformer (manual embedding if needed)
-        self.model = SentenceTransformer(model_name)
-
-        # LangChain-compatible embedding model
-        self.hf_model = HuggingFaceEmbeddings(model_name=model_name)
-
-        self.chunk_size = chunk_size
-        self.chunk_overlap = chunk_overlap
+        # Shared engine: raw encode() and LangChain Embeddings on the same weights
+        self.engine = get_embedding_engine(model_name)
+        self.model = self.engine
+        self.hf_model = self.engine
+
+        self.model_name = model_name
+
+        # Same chunking settings as project.chunk (CHUNK_STRATEGY / CHUNK_SIZE / CHUNK_OVERLAP)
+        self.chunking = chunking_config(chunk_strategy, chunk_size, chunk_overlap)
+        self.chunk_strategy = self.chunking["strategy"]
+        self.chunk_size = self.chunking["chunk_size"]
+        self.chunk_overlap = self.chunking["chunk_overlap"]
         self.persist_path = persist_path
 
     # --------------------------------------------------
     # Document Splitting
     # --------------------------------------------------
     def split_doc(self, documents: List[Any]) -> List[Document]:
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            separators=["\n\n", "\n", " ", ""]
-        )
-
-        split_docs: List[Document] = []
-
-        for doc in documents:
-            chunks = text_splitter.split_text(doc.page_content)
-
-            for chunk in chunks:
-                split_docs.append(
-                    Document(page_content=chunk)
-                )
+        return list(self.iter_split_doc(documents))
 
-        return split_docs
+    def iter_split_doc(self, documents: Iterable[Any]) -> Iterator[Document]:
+        """
+        Generator version of split_doc: pages stream in, chunks stream out
+        (with source / page / start_index / content_hash metadata)
+        """
+        yield from iter_split_documents(documents, self.chunk_size, self.chunk_overlap,
+                                        self.chunk_strategy, embedding=self.engine)
 
     # --------------------------------------------------
     # Manual Embedding (SentenceTransformer)
@@ -77,36 +138,72 @@ class EmbeddingPipeline:
     def create_vector_store(
         self,
         documents: List[Document],
-        persist_path: str | None = None
+        persist_path: str | None = None,
+        batch_size: int | None = None,
+        workers: int = 1,
+        vector_codec: str | None = None,
+        pca_dim: int | None = None
     ):
-        split_docs = self.split_doc(documents)
-
-        vector_store = FAISS.from_documents(
-            split_docs,
-            self.hf_model
-        )
-
-        if persist_path:
-            vector_store.save_local(persist_path)
+        """
+        Build the FAISS store and publish it as a new index version
+        (project.store.versions). With batch_size set, chunks are
+        streamed through a ParallelEmbedder (workers processes) and added
+        to the index batch by batch.
+
+        vector_codec (VECTOR_CODEC: float32 | float16 | sq8) and pca_dim
+        (PCA_DIM) store compressed vectors; the PCA matrix and quantizer live
+        inside the index, so queries are projected the same way at search
+        time. They are trained on a uniform sample of the chunk vectors while
+        the batches wait in a disk spool (project.store.index_factory.TrainingSpool).
+        """
+        vector_codec = vector_codec or os.getenv("VECTOR_CODEC", "float32")
+        pca_dim = pca_dim or int(os.getenv("PCA_DIM", "0")) or None
+        persist_path = persist_path or self.persist_path
+
+        if vector_codec != "float32" or pca_dim:
+            from project.embed.parallel import ParallelEmbedder
+            from project.store.index_factory import TrainingSpool
+
+            embedder = ParallelEmbedder(self.model_name, batch_size=batch_size or 256, workers=workers)
+            spool = TrainingSpool(f"{persist_path}.spool")
+            for docs, vectors in embedder.embed_batches(self.iter_split_doc(documents)):
+                spool.add([d.page_content for d in docs], vectors, [d.metadata for d in docs])
+            embedder.print_report()
+            if not spool.seen:
+                spool.close()
+                raise ValueError("No chunks to index")
+            vector_store = spool.build(self.hf_model, "flat", codec=vector_codec, pca_dim=pca_dim)
+        elif batch_size is None:
+            vector_store = FAISS.from_documents(
+                self.split_doc(documents),
+                self.hf_model
+            )
         else:
-            vector_store.save_local(self.persist_path)
-
+            from project.embed.parallel import ParallelEmbedder
+
+            embedder = ParallelEmbedder(self.model_name, batch_size=batch_size, workers=workers)
+            vector_store = None
+            for docs, vectors in embedder.embed_batches(self.iter_split_doc(documents)):
+                text_embeddings = list(zip([d.page_content for d in docs], vectors.tolist()))
+                metadatas = [d.metadata for d in docs]
+                if vector_store is None:
+                    vector_store = FAISS.from_embeddings(text_embeddings, self.hf_model, metadatas=metadatas)
+                else:
+                    vector_store.add_embeddings(text_embeddings, metadatas=metadatas)
+            embedder.print_report()
+
+        from project.store import publish_vector_store
+
+        publish_vector_store(vector_store, persist_path)
         return vector_store
 
     # --------------------------------------------------
     # Load Retriever
     # --------------------------------------------------
     def load_retriever(self, embedding, k: int = 3):
-        vector_store = FAISS.load_local(
-            self.persist_path,
-            embedding,
-            allow_dangerous_deserialization=True
-        )
+        from project.store import VectorStorePipeline
 
-        return vector_store.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": k}
-        )
+        return VectorStorePipeline(self.persist_path).load_retriever(embedding, k=k)
 
 
 # --------------------------------------------------
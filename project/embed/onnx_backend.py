@@ -0,0 +1,130 @@
+"""
+ONNX Runtime embedding backend (no torch at serving time).
+
+    python -m project.embed.onnx_backend export --output models/all-MiniLM-L6-v2-onnx
+
+The export step (needs torch + transformers once) writes model.onnx, an
+int8 dynamically-quantized model_int8.onnx and tokenizer.json. Serving
+then only needs onnxruntime and tokenizers:
+
+    EMBEDDING_BACKEND=onnx ONNX_MODEL_PATH=models/all-MiniLM-L6-v2-onnx
+"""
+import argparse
+import os
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+DEFAULT_ONNX_PATH = "models/all-MiniLM-L6-v2-onnx"
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+class OnnxEmbeddingEngine(Embeddings):
+    """
+    Same interface as EmbeddingEngine (encode / embed_documents / embed_query):
+    transformer forward pass in ONNX Runtime, mean pooling over the attention
+    mask and L2 normalization, like the all-MiniLM SentenceTransformer.
+    """
+
+    def __init__(self, model_path: str = DEFAULT_ONNX_PATH, model_name: str | None = None,
+                 quantized: bool = True, max_length: int = 256, threads: int | None = None,
+                 batch_size: int = 64):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_path = model_path
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_path, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        threads = threads or int(os.getenv("ONNX_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+        self.model_file = os.path.join(model_path, ONNX_INT8_FILE if quantized else ONNX_MODEL_FILE)
+        self.session = ort.InferenceSession(self.model_file, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        feed = {
+            "input_ids": np.array([e.ids for e in encodings], dtype="int64"),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype="int64"),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype="int64"),
+        }
+        hidden = self.session.run(None, {k: v for k, v in feed.items() if k in self.input_names})[0]
+
+        mask = feed["attention_mask"][..., None].astype("float32")
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def encode(self, texts: List[str], batch_size: int | None = None, **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size)[0]
+        batch_size = batch_size or self.batch_size
+        if not texts:
+            return np.zeros((0, 0), dtype="float32")
+        return np.vstack([
+            self._encode_batch(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)
+        ]).astype("float32")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = [text.replace("\n", " ") for text in texts]
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+# --------------------------------------------------
+# One-off export (torch + transformers needed here only)
+# --------------------------------------------------
+def export_onnx(model_name: str, output: str = DEFAULT_ONNX_PATH, opset: int = 17, quantize: bool = True):
+    """
+    Export the transformer of model_name to ONNX and quantize its weights to int8
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(output)  # writes tokenizer.json (fast tokenizer)
+
+    sample = tokenizer(["an example sentence"], return_tensors="pt")
+    inputs = tuple(sample[name] for name in ("input_ids", "attention_mask", "token_type_ids"))
+    dynamic = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model, inputs, os.path.join(output, ONNX_MODEL_FILE),
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic, "token_type_ids": dynamic,
+                          "last_hidden_state": dynamic},
+            opset_version=opset
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(os.path.join(output, ONNX_MODEL_FILE), os.path.join(output, ONNX_INT8_FILE),
+                         weight_type=QuantType.QInt8)
+    print(f"✅ Exported {model_name} to {output}")
+
+
+if __name__ == "__main__":
+    from project.embed import DEFAULT_MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="Export the embedding model to (int8) ONNX")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--output", default=DEFAULT_ONNX_PATH)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+    export_onnx(args.model, args.output, quantize=not args.no_quantize)
@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List
+
+import numpy as np
+from langchain_core.documents import Document
+
+from project.timing import peak_rss_mb
+
+
+# --------------------------------------------------
+# Worker process side
+# --------------------------------------------------
+_worker_engine = None
+
+
+def _init_worker(model_name: str, threads: int):
+    global _worker_engine
+    if os.getenv("EMBEDDING_BACKEND", "torch") == "onnx":
+        os.environ["ONNX_THREADS"] = str(threads)
+    else:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+    from project.embed import get_embedding_engine
+    _worker_engine = get_embedding_engine(model_name)
+
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_engine.embed_documents(texts), dtype="float32")
+
+
+def _batches(chunks: Iterable[Document], batch_size: int) -> Iterator[List[Document]]:
+    batch = []
+    for doc in chunks:
+        batch.append(doc)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ParallelEmbedder:
+    """
+    Streams chunks through the embedding model in fixed-size batches,
+    spread over a pool of CPU worker processes (each loads its own model
+    with threads_per_worker torch threads). Only max_in_flight batches are
+    held at once, so memory does not grow with the corpus.
+
+    workers=1 embeds in-process with the shared engine.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 64, workers: int | None = None,
+                 threads_per_worker: int = 1, max_in_flight: int | None = None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.threads_per_worker = threads_per_worker
+        self.max_in_flight = max_in_flight or self.workers * 2
+        self.stats = {}
+
+    def embed_batches(self, chunks: Iterable[Document]) -> Iterator[tuple]:
+        """
+        Yield (documents, float32 vectors) per batch, in input order
+        """
+        start = time.perf_counter()
+        count = 0
+
+        if self.workers == 1:
+            from project.embed import get_embedding_engine
+            engine = get_embedding_engine(self.model_name)
+            for batch in _batches(chunks, self.batch_size):
+                vectors = np.asarray(engine.embed_documents([d.page_content for d in batch]), dtype="float32")
+                count += len(batch)
+                yield batch, vectors
+        else:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker,
+                                     initargs=(self.model_name, self.threads_per_worker)) as pool:
+                in_flight = []
+                for batch in _batches(chunks, self.batch_size):
+                    in_flight.append((batch, pool.submit(_encode_batch, [d.page_content for d in batch])))
+                    if len(in_flight) >= self.max_in_flight:
+                        done_batch, future = in_flight.pop(0)
+                        count += len(done_batch)
+                        yield done_batch, future.result()
+                for done_batch, future in in_flight:
+                    count += len(done_batch)
+                    yield done_batch, future.result()
+
+        seconds = time.perf_counter() - start
+        self.stats = {
+            "chunks": count,
+            "seconds": round(seconds, 3),
+            "chunks_per_sec": round(count / seconds, 2) if seconds else 0.0,
+            "batch_size": self.batch_size,
+            "workers": self.workers,
+            "peak_rss_mb": peak_rss_mb(),
+            "worker_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN)
+        }
+
+    def print_report(self):
+        s = self.stats
+        print(f"⚡ Embedded {s['chunks']} chunks in {s['seconds']}s "
+              f"({s['chunks_per_sec']} chunks/sec, batch={s['batch_size']}, workers={s['workers']})")
+        print(f"   peak RSS: main {s['peak_rss_mb']} MB, worker {s['worker_peak_rss_mb']} MB")
@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from project.metrics import timed
+
+
+HEADER_FILE = "header.json"
+
+
+def query_key(text: str) -> str:
+    """
+    MiniLM is uncased and whitespace-insensitive, so lowercasing and
+    collapsing whitespace never changes the vector
+    """
+    return " ".join(text.lower().split())
+
+
+def key_hash(key: str) -> int:
+    """
+    Non-zero 64-bit hash of a cache key (0 marks an empty row)
+    """
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") | 1
+
+
+def embedding_identity(embedding) -> str:
+    """
+    What the vectors depend on: engine class (torch / onnx backend), model
+    name and, for ONNX, the weights file (int8 or float32)
+    """
+    parts = (type(embedding).__name__, getattr(embedding, "model_name", None), getattr(embedding, "model_file", None))
+    return ":".join(str(part) for part in parts if part)
+
+
+def read_header(path: str) -> dict | None:
+    try:
+        with open(os.path.join(path, HEADER_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class MmapVectorStore:
+    """
+    Fixed-capacity on-disk cache of query vectors (numpy memmaps) that
+    survives restarts and is shared by every process using the same path.
+
+        vectors.f32   capacity x dim vectors
+        keys.u64      64-bit hash of the key stored in each row (0 = empty)
+        header.json   dim, capacity and embedding model; the files are
+                      recreated when any of them changes
+
+    A key lives in row hash % capacity (a newer key evicts an older one in
+    the same row). Reads take a shared and writes an exclusive fcntl lock,
+    and a row is only returned when its stored hash matches the key, so
+    several uvicorn workers never hand out each other's vectors.
+    """
+
+    def __init__(self, path: str, dim: int, capacity: int = 65536, flush_every: int = 64, model: str = ""):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.dim = dim
+        self.capacity = capacity
+        self.model = model
+        self.flush_every = flush_every
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.hashes_path = os.path.join(path, "keys.u64")
+        self.header_path = os.path.join(path, HEADER_FILE)
+        self.lock_file = open(os.path.join(path, "lock"), "a+")
+
+        with self._locked(exclusive=True):
+            if not self._matches():
+                self._create()
+            self.vectors = np.memmap(self.vectors_path, dtype="float32", mode="r+", shape=(capacity, dim))
+            self.hashes = np.memmap(self.hashes_path, dtype="uint64", mode="r+", shape=(capacity,))
+        self.pending = 0
+
+    @contextmanager
+    def _locked(self, exclusive: bool = False):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+
+    def _matches(self) -> bool:
+        """
+        The files on disk have this store's dim, capacity and model
+        """
+        if read_header(self.path) != self.header():
+            return False
+        try:
+            return (os.path.getsize(self.vectors_path) == self.capacity * self.dim * 4
+                    and os.path.getsize(self.hashes_path) == self.capacity * 8)
+        except OSError:
+            return False
+
+    def _create(self):
+        # Replace rather than truncate: processes still mapping the old
+        # files keep a consistent (if stale) copy
+        for target, dtype, shape in ((self.vectors_path, "float32", (self.capacity, self.dim)),
+                                     (self.hashes_path, "uint64", (self.capacity,))):
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            np.memmap(tmp_path, dtype=dtype, mode="w+", shape=shape).flush()
+            os.replace(tmp_path, target)
+        tmp_path = f"{self.header_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.header(), f)
+        os.replace(tmp_path, self.header_path)
+
+    def header(self) -> dict:
+        return {"dim": self.dim, "capacity": self.capacity, "model": self.model}
+
+    def get(self, key: str):
+        h = key_hash(key)
+        slot = h % self.capacity
+        with self._locked():
+            if int(self.hashes[slot]) != h:
+                return None
+            return np.array(self.vectors[slot])
+
+    def put(self, key: str, vector):
+        h = key_hash(key)
+        slot = h % self.capacity
+        with self._locked(exclusive=True):
+            self.vectors[slot] = vector
+            self.hashes[slot] = h
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.vectors.flush()
+        self.hashes.flush()
+        self.pending = 0
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    LangChain Embeddings wrapper with a bounded, thread-safe LRU of query
+    vectors. embed_documents (ingestion) is passed straight through.
+
+    Optionally backed by an MmapVectorStore (disk_path) that is consulted on
+    an in-memory miss and survives restarts.
+    """
+
+    def __init__(self, embedding, max_entries: int = 4096, disk_path: str | None = None,
+                 disk_capacity: int = 65536):
+        self.embedding = embedding
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.disk_path = disk_path
+        self.disk_capacity = disk_capacity
+        self.disk_model = embedding_identity(embedding)
+        self.disk = None
+        header = read_header(disk_path) if disk_path else None
+        # Another model's vectors are never served; its store is recreated on the first miss
+        if header is not None and header.get("model") == self.disk_model:
+            self.open_disk(header["dim"])
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.miss_seconds = 0.0
+        self.hit_seconds = 0.0
+
+    def _remember(self, key: str, vector: List[float]):
+        self.entries[key] = vector
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _lookup(self, key: str):
+        start = time.perf_counter()
+        with self.lock:
+            vector = self.entries.get(key)
+            if vector is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            elif self.disk is not None:
+                stored = self.disk.get(key)
+                if stored is not None:
+                    vector = stored.tolist()
+                    self._remember(key, vector)
+                    self.hits += 1
+                    self.disk_hits += 1
+            if vector is not None:
+                self.hit_seconds += time.perf_counter() - start
+        return vector
+
+    def _store(self, key: str, vector: List[float], seconds: float):
+        with self.lock:
+            self.misses += 1
+            self.miss_seconds += seconds
+            self._remember(key, vector)
+            if self.disk_path:
+                if self.disk is None:
+                    self.disk = MmapVectorStore(self.disk_path, len(vector), self.disk_capacity,
+                                                model=self.disk_model)
+                self.disk.put(key, np.asarray(vector, dtype="float32"))
+
+    def embed_query(self, text: str) -> List[float]:
+        with timed("query_embedding"):
+            key = query_key(text)
+            vector = self._lookup(key)
+            if vector is not None:
+                return vector
+            start = time.perf_counter()
+            vector = self.embedding.embed_query(text)
+            self._store(key, vector, time.perf_counter() - start)
+            return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        with timed("query_embedding"):
+            key = query_key(text)
+            vector = self._lookup(key)
+            if vector is not None:
+                return vector
+            loop = asyncio.get_running_loop()
+            start = time.perf_counter()
+            vector = await loop.run_in_executor(None, self.embedding.embed_query, text)
+            self._store(key, vector, time.perf_counter() - start)
+            return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embedding.embed_documents(texts)
+
+    def open_disk(self, dim: int):
+        """
+        Attach the on-disk store up front (otherwise it opens on the first miss)
+        """
+        if self.disk_path and self.disk is None:
+            self.disk = MmapVectorStore(self.disk_path, dim, self.disk_capacity, model=self.disk_model)
+
+    def flush(self):
+        with self.lock:
+            if self.disk is not None:
+                self.disk.flush()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        avg_miss = self.miss_seconds / self.misses if self.misses else 0.0
+        avg_hit = self.hit_seconds / self.hits if self.hits else 0.0
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "avg_embed_ms": round(avg_miss * 1000, 3),
+            "saved_seconds": round(max(avg_miss - avg_hit, 0.0) * self.hits, 3)
+        }
@@ -1,23 +1,113 @@
-from langchain_community.document_loaders import PyPDFLoader 
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List
+import multiprocessing
+import glob
+import os
 
 
 class DocumentProcessor:
     def __init__(self, file_path:str):
         self.file_path = file_path
         self.loader = PyPDFLoader(self.file_path)
-    
+
     def load_documents(self):
         documents = self.loader.load()
         return documents
-    
+
+    def lazy_load_documents(self) -> Iterator[Document]:
+        """
+        Yield pages one at a time instead of materializing the whole book
+        """
+        yield from self.loader.lazy_load()
+
     def display_pages(self,documents,idx=5,num_chars=200):
         for idx,page in enumerate(documents[:idx]):
             print(f"Page: {idx}")
             print("Page_content:",page.page_content[:num_chars])
-        
+
+
+# --------------------------------------------------
+# Multi-file, multi-process loading
+# --------------------------------------------------
+def _page_count(file_path: str) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(file_path).pages)
+
+
+def _parse_pages(file_path: str, start: int, end: int) -> List[Document]:
+    """
+    Worker: extract pages [start, end) of one PDF
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(file_path)
+    total_pages = len(reader.pages)
+    pages = []
+    for number in range(start, min(end, total_pages)):
+        pages.append(Document(
+            page_content=reader.pages[number].extract_text() or "",
+            metadata={
+                "source": file_path,
+                "page": number,
+                "page_label": str(number + 1),
+                "total_pages": total_pages
+            }
+        ))
+    return pages
+
+
+class DirectoryDocumentProcessor:
+    """
+    Streams pages of every PDF under a directory (or a list of files).
+
+    Files are cut into page ranges of pages_per_task pages that are parsed
+    in parallel worker processes; at most max_in_flight ranges are pending,
+    so memory stays flat however many books are ingested. Pages come out
+    in file/page order.
+    """
+
+    def __init__(self, path, pattern: str = "**/*.pdf", workers: int | None = None,
+                 pages_per_task: int = 16, max_in_flight: int | None = None):
+        if isinstance(path, (list, tuple)):
+            self.files = list(path)
+        elif os.path.isdir(path):
+            self.files = sorted(glob.glob(os.path.join(path, pattern), recursive=True))
+        else:
+            self.files = [path]
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.pages_per_task = pages_per_task
+        self.max_in_flight = max_in_flight or self.workers * 2
+
+    def tasks(self) -> Iterator[tuple]:
+        for file_path in self.files:
+            total = _page_count(file_path)
+            for start in range(0, total, self.pages_per_task):
+                yield file_path, start, start + self.pages_per_task
+
+    def lazy_load_documents(self) -> Iterator[Document]:
+        if self.workers == 1:
+            for file_path in self.files:
+                yield from DocumentProcessor(file_path).lazy_load_documents()
+            return
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(self.workers, mp_context=context) as pool:
+            in_flight = []
+            for task in self.tasks():
+                in_flight.append(pool.submit(_parse_pages, *task))
+                if len(in_flight) >= self.max_in_flight:
+                    yield from in_flight.pop(0).result()
+            for future in in_flight:
+                yield from future.result()
+
+    def load_documents(self) -> List[Document]:
+        return list(self.lazy_load_documents())
+
 
 
 if __name__ == "__main__":
     processor = DocumentProcessor("project/data/Medical_book.pdf")
     docs = processor.load_documents()
-    processor.display_pages(docs,idx=5,num_chars=200)
\ No newline at end of file
+    processor.display_pages(docs,idx=5,num_chars=200)
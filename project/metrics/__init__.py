@@ -0,0 +1,178 @@
+"""
+Hot-path latency histograms in the Prometheus text format.
+
+    with timed("faiss_search"):
+        ...
+
+Every observation goes to the process-wide `medchat_stage_seconds{stage=...}`
+histogram and, when a request opened one with request_timings(), into that
+request's breakdown (carried in a ContextVar, so it follows the request
+through asyncio tasks and LangChain's executor threads).
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_breakdown: ContextVar = ContextVar("request_breakdown", default=None)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with one label (Prometheus semantics)
+    """
+
+    def __init__(self, name: str, help: str, label: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[str, dict] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float):
+        with self.lock:
+            series = self.series.get(label_value)
+            if series is None:
+                series = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self.series[label_value] = series
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_value, series in sorted(self.series.items()):
+                labels = f'{self.label}="{label_value}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["counts"]):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{labels}}} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{{{labels}}} {series['count']}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "medchat_stage_seconds",
+    "Latency of one chat pipeline stage",
+    "stage"
+)
+
+
+def observe(stage: str, seconds: float):
+    STAGE_SECONDS.observe(stage, seconds)
+    breakdown = _breakdown.get()
+    if breakdown is not None:
+        breakdown[stage] = round(breakdown.get(stage, 0.0) + seconds * 1000, 3)
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+@contextmanager
+def request_timings():
+    """
+    Collect the per-stage milliseconds of the current request into the yielded dict
+    """
+    breakdown = {}
+    token = _breakdown.set(breakdown)
+    try:
+        yield breakdown
+    finally:
+        _breakdown.reset(token)
+
+
+class LLMTimingCallback(BaseCallbackHandler):
+    """
+    llm_ttft (first streamed token) and llm_total per chat-model call.
+
+    Time to first token is only observed when the model streams
+    (astream / /api/chat/stream); a non-streaming call only reports llm_total.
+    """
+
+    run_inline = True  # keep the request's ContextVar
+
+    def __init__(self):
+        self.started: Dict[UUID, list] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        self.started[run_id] = [time.perf_counter(), False]
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs):
+        self.started[run_id] = [time.perf_counter(), False]
+
+    def on_llm_new_token(self, token, *, run_id: UUID, **kwargs):
+        state = self.started.get(run_id)
+        if state is not None and not state[1]:
+            state[1] = True
+            observe("llm_ttft", time.perf_counter() - state[0])
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        state = self.started.pop(run_id, None)
+        if state is not None:
+            observe("llm_total", time.perf_counter() - state[0])
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        self.started.pop(run_id, None)
+
+
+# --------------------------------------------------
+# /metrics exposition
+# --------------------------------------------------
+def render_counter(name: str, help: str, samples: Iterable[Tuple[dict, float]], kind: str = "counter") -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+        lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return lines
+
+
+def render_metrics(answer_cache: dict | None = None, query_cache: dict | None = None,
+                   executor: dict | None = None) -> str:
+    """
+    Stage histograms plus cache and executor counters from their stats() dicts
+    """
+    lines = STAGE_SECONDS.render()
+
+    cache_samples = []
+    if answer_cache:
+        cache_samples += [
+            ({"cache": "answer", "result": "exact_hit"}, answer_cache.get("exact_hits", 0)),
+            ({"cache": "answer", "result": "semantic_hit"}, answer_cache.get("semantic_hits", 0)),
+            ({"cache": "answer", "result": "miss"}, answer_cache.get("misses", 0)),
+        ]
+    if query_cache:
+        cache_samples += [
+            ({"cache": "query_embedding", "result": "hit"}, query_cache.get("hits", 0)),
+            ({"cache": "query_embedding", "result": "miss"}, query_cache.get("misses", 0)),
+        ]
+    if cache_samples:
+        lines += render_counter("medchat_cache_requests_total", "Cache lookups by result", cache_samples)
+
+    if executor:
+        lines += render_counter("medchat_chat_running", "Chains currently running",
+                                [({}, executor.get("running", 0))], kind="gauge")
+        lines += render_counter("medchat_chat_waiting", "Requests waiting for a chain slot",
+                                [({}, executor.get("waiting", 0))], kind="gauge")
+        lines += render_counter("medchat_chat_rejected_total", "Requests rejected with 429",
+                                [({}, executor.get("rejected", 0))])
+    return "\n".join(lines) + "\n"
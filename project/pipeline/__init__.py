@@ -1,88 +1,280 @@
 from project.chatmodel import Groqllm
-from project.load_data import DocumentProcessor
-from project.chunk import SplitterDocumentProcessor
 from project.embed import EmbeddingPipeline
+from project.embed.query_cache import CachedQueryEmbeddings
+from project.cache import CachedRetrievalChain, SemanticAnswerCache
 from project.store import VectorStorePipeline
+from project.store.batch import search_batch
+from project.store.versions import has_index, resolve_index_path
+from project.store.bm25 import BM25Index
+from project.store.hybrid import load_hybrid_retriever
+from project.rerank import DEFAULT_RERANK_MODEL, load_rerank_retriever
+from project.metrics import LLMTimingCallback
+from project.timing import PhaseTimer
 from langchain_classic.chains.combine_documents import create_stuff_documents_chain
 from langchain_classic.chains.retrieval import create_retrieval_chain
+from langchain_core.runnables import ConfigurableField, RunnableLambda, RunnablePassthrough
 from project.prompt import template
+from project.prompt.context import ContextAssembler
 
 from dotenv import load_dotenv
+from typing import Any, NamedTuple
+import asyncio
+import contextvars
 import os
 import sys
+import time
+
+# Add current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 load_dotenv()
 groq_api_key = os.getenv('GROQ_API_KEY')
 pdf_path = "project/data/Medical_book.pdf"
-persist_path="faiss_index"
+persist_path = "faiss_index"
 
+# Last startup report, exposed by the servers on /api/health
+startup_report = None
 
-# pipeline.py - SIMPLE VERSION
-from dotenv import load_dotenv
-import os
-import sys
+# Query-embedding cache, retriever and context assembler of the serving pipeline (stats on /api/health)
+query_embeddings = None
+retriever = None
+context_assembler = None
 
-# Add current directory to Python path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Prompt + LLM part of the chain, reused by batch_answer()
+combine_chain = None
 
-load_dotenv()
+# Groq client, built once per process and shared by reloaded chains
+chat_model = None
+
+
+def answer_cache(embedding, index_path: str = persist_path):
+    """
+    Answer cache configured from the environment (ANSWER_CACHE=0 disables it)
+    """
+    if os.getenv("ANSWER_CACHE", "1") == "0":
+        return None
+    return SemanticAnswerCache(
+        embedding=embedding,
+        threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92")),
+        max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "2048")),
+        ttl=float(os.getenv("ANSWER_CACHE_TTL", "86400")),
+        persist_path=os.getenv("ANSWER_CACHE_PATH"),
+        index_path=index_path
+    )
 
-def main_pipeline():
+
+class ServingPipeline(NamedTuple):
+    """
+    A built chain and the components batch_answer() and /api/health read
     """
-    Simple pipeline that loads pre-built vector store
+    chain: Any
+    query_embeddings: Any
+    retriever: Any
+    context_assembler: Any
+    combine_chain: Any
+    startup_report: dict
+
+
+def install(pipeline: ServingPipeline):
     """
+    Make a built pipeline the served one and return its chain. Only called
+    from the thread that serves requests (startup or the index reloader's
+    swap), never from the worker thread that built it.
+    """
+    global startup_report, query_embeddings, retriever, context_assembler, combine_chain
+    startup_report = pipeline.startup_report
+    query_embeddings, retriever = pipeline.query_embeddings, pipeline.retriever
+    context_assembler, combine_chain = pipeline.context_assembler, pipeline.combine_chain
+    return pipeline.chain
+
+
+def main_pipeline(rebuild: bool = False, llm=None, embedding=None, index_path: str | None = None):
+    """
+    build_pipeline() and install() in one step (startup, scripts, benchmarks)
+    """
+    return install(build_pipeline(rebuild, llm, embedding, index_path))
+
+
+def build_pipeline(rebuild: bool = False, llm=None, embedding=None,
+                   index_path: str | None = None) -> ServingPipeline:
+    """
+    Serving pipeline: open the persisted FAISS index and the LLM client.
+
+    The PDF corpus is only parsed when an index rebuild is requested
+    (rebuild=True), never on a normal server start. The returned chain is
+    wrapped in the answer cache unless ANSWER_CACHE=0.
+
+    llm / embedding replace ChatGroq and the SentenceTransformer (offline
+    benchmarks); index_path overrides the default faiss_index directory.
+    With versioned indexes (project.store.versions) the CURRENT version
+    is opened. Calling it again (index hot-swap) reuses the Groq client and
+    the query-embedding cache. The module-level components are left alone
+    until install().
+    """
+    global chat_model
     print("🔧 Loading Medical Chatbot...")
-    
-    # 1. Get API key
-    groq_api_key = os.getenv('GROQ_API_KEY')
-
-    print("🔧 Loading Grpq LLM...")
-    llm = Groqllm(api_key=groq_api_key)
-    model = llm.call()
-
-    # Load Data
-    print("🔧 Loading Data...")
-    processor = DocumentProcessor(file_path=pdf_path)
-    documents = processor.load_documents()
-    
+    timer = PhaseTimer("startup")
+
+    # 1. Optional rebuild (the only path that touches the corpus)
+    if rebuild:
+        from project.pipeline.store_faiss import faiss_store
+        with timer.phase("rebuild index"):
+            faiss_store()
+
+    # 2. Check if vector store exists
+    print("🔄 Checking vector store...")
+    index_path = resolve_index_path(index_path or persist_path)
+    if not has_index(index_path):
+        raise FileNotFoundError(
+            f"Vector store '{index_path}' not found. "
+            "Build it first: python -m project.pipeline.store_faiss"
+        )
+
+    # 3. Groq LLM client
+    print("🔧 Loading Groq LLM...")
+    with timer.phase("llm client"):
+        if llm is None:
+            if chat_model is None:
+                chat_model = Groqllm(api_key=os.getenv('GROQ_API_KEY'), callbacks=[LLMTimingCallback()]).call()
+            model = chat_model
+        else:
+            model = llm.with_config(callbacks=[LLMTimingCallback()])
+
     # 4. Load embedding model
     print("🔄 Loading embeddings...")
-    em_pipe = EmbeddingPipeline(persist_path=persist_path)
+    with timer.phase("embedding model"):
+        if embedding is None and query_embeddings is not None:
+            em_model = query_embeddings
+        else:
+            if embedding is None:
+                embedding = EmbeddingPipeline(persist_path=index_path).embed_model()
+            em_model = CachedQueryEmbeddings(
+                embedding,
+                max_entries=int(os.getenv("QUERY_CACHE_SIZE", "4096")),
+                disk_path=os.getenv("QUERY_CACHE_PATH")
+            )
 
+    # 5. Load retriever
+    print("🔄 Loading vector store...")
+    with timer.phase("faiss index"):
+        search_retriever = VectorStorePipeline(index_path).load_retriever(em_model)
 
+    # 6. Keyword index fused with the vector search (HYBRID_SEARCH=0 disables it)
+    if BM25Index.exists(index_path) and os.getenv("HYBRID_SEARCH", "1") != "0":
+        print("🔄 Loading BM25 keyword index...")
+        with timer.phase("bm25 index"):
+            search_retriever = load_hybrid_retriever(
+                index_path, search_retriever,
+                candidates=int(os.getenv("HYBRID_CANDIDATES", "20"))
+            )
 
-## Firt time run code 
-    ## em_pipe.create_vector_store(documents)
-    
+    # 7. Optional cross-encoder re-ranking of an over-fetched candidate set (RERANK=1)
+    if os.getenv("RERANK", "0") == "1":
+        print("🔄 Loading re-ranker...")
+        with timer.phase("reranker"):
+            search_retriever = load_rerank_retriever(
+                search_retriever,
+                model_name=os.getenv("RERANK_MODEL", DEFAULT_RERANK_MODEL),
+                candidates=int(os.getenv("RERANK_CANDIDATES", "20")),
+                budget_ms=float(os.getenv("RERANK_BUDGET_MS", "250")),
+                max_in_flight=int(os.getenv("RERANK_MAX_IN_FLIGHT", "2"))
+            )
 
+    with timer.phase("chain"):
+        # search_kwargs can be overridden per request (source filter, see project.store.retrieval_config)
+        retrieve = RunnableLambda(lambda x: x["input"]) | search_retriever.configurable_fields(
+            search_kwargs=ConfigurableField(id="search_kwargs")
+        )
 
-    # 5. Check if vector store exists
-    print("🔄 Checking vector store...")
-    if not os.path.exists(persist_path):
-        print("❌ Vector store not found!")
+        # 8. Create chain; retrieved chunks are deduplicated and trimmed to the context budget
+        print("🔄 Creating chain...")
+        prompt = template()
+        assembler = ContextAssembler(
+            max_tokens=int(os.getenv("CONTEXT_MAX_TOKENS", "1500")),
+            prompt=prompt,
+            log=os.getenv("LOG_PROMPT_TOKENS", "1") != "0"
+        )
+        packed_retriever = RunnablePassthrough.assign(docs=retrieve) | RunnableLambda(
+            lambda x: assembler.pack(x["docs"], x["input"])
+        )
+        combine = create_stuff_documents_chain(model, prompt)
+        retrieval_chain = create_retrieval_chain(packed_retriever, combine)
 
-    print("💡 Create Vector store sucessfull")
-        
+    # 9. Answer cache in front of the chain
+    with timer.phase("answer cache"):
+        cache = answer_cache(em_model, index_path)
+        if cache is not None:
+            retrieval_chain = CachedRetrievalChain(retrieval_chain, cache)
+
+    timer.print_report()
+    report_path = os.getenv("STARTUP_REPORT_PATH")
+    if report_path:
+        timer.save(report_path)
 
-    # 6. Load retriever
-    print("🔄 Loading vector store...")
-    em_model = em_pipe.embed_model()
-    retriever = em_pipe.load_retriever(em_model)
-    
-    # 7. Create chain
-    print("🔄 Creating chain...")
-    prompt = template()
-    combine_chain = create_stuff_documents_chain(model, prompt)
-    retrieval_chain = create_retrieval_chain(retriever, combine_chain)
-    
     print("✅ Chatbot ready!")
-    return retrieval_chain
+    return ServingPipeline(retrieval_chain, em_model, search_retriever, assembler, combine, timer.report())
+
+
+# --------------------------------------------------
+# Batch question answering
+# --------------------------------------------------
+async def abatch_answer(questions, search_kwargs: dict | None = None, max_concurrency: int = 4):
+    """
+    Answer many questions with one embedding call and one FAISS search.
+
+    Queries are encoded in a single embed_documents() batch, searched as one
+    matrix, packed like /api/chat, and the LLM calls fan out with at most
+    max_concurrency in flight. Returns one dict per question, in order, with
+    either an answer or an error.
+    """
+    if combine_chain is None:
+        raise RuntimeError("main_pipeline() has not been run")
+    questions = list(questions)
+    if not questions:
+        return []
+
+    search_retriever = retriever
+    if search_kwargs:
+        search_retriever = retriever.model_copy(update={"search_kwargs": dict(retriever.search_kwargs, **search_kwargs)})
+
+    def retrieve():
+        start = time.perf_counter()
+        vectors = query_embeddings.embed_documents(questions)
+        embed_seconds = time.perf_counter() - start
+        results = search_batch(search_retriever, questions, vectors)
+        return [context_assembler.pack(docs, q) for q, docs in zip(questions, results)], embed_seconds
+
+    # Copy the context so the worker thread records into this request's timing breakdown
+    context = contextvars.copy_context()
+    contexts, embed_seconds = await asyncio.get_running_loop().run_in_executor(None, context.run, retrieve)
+    print(f"📦 Batch of {len(questions)}: embedded in {embed_seconds:.3f}s")
+
+    answers = await combine_chain.abatch(
+        [{"input": q, "context": docs} for q, docs in zip(questions, contexts)],
+        config={"max_concurrency": max_concurrency},
+        return_exceptions=True
+    )
+    results = []
+    for question, docs, answer in zip(questions, contexts, answers):
+        if isinstance(answer, Exception):
+            results.append({"input": question, "answer": None, "context": docs, "error": str(answer)})
+        else:
+            results.append({"input": question, "answer": answer, "context": docs, "error": None})
+    return results
+
+
+def batch_answer(questions, search_kwargs: dict | None = None, max_concurrency: int = 4):
+    """
+    Synchronous abatch_answer() for scripts and evaluation jobs
+    """
+    return asyncio.run(abatch_answer(questions, search_kwargs, max_concurrency))
+
 
 if __name__ == "__main__":
     try:
-        chain = main_pipeline()
+        chain = main_pipeline(rebuild="--rebuild" in sys.argv)
         print("\n🧪 Testing...")
         response = chain.invoke({"input": "What is Abortion, therapeutic?"})
         print(f"🤖 {response['answer'][:200]}...")
     except Exception as e:
-        print(f"❌ Error: {e}")
\ No newline at end of file
+        print(f"❌ Error: {e}")
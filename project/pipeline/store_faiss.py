@@ -1,8 +1,13 @@
-from project.chatmodel import Groqllm
-from project.load_data import DocumentProcessor
+from project.load_data import DocumentProcessor, DirectoryDocumentProcessor
 from project.embed import EmbeddingPipeline
+from project.embed.parallel import ParallelEmbedder
+from project.store.incremental import IncrementalIndexBuilder
+from project.store.index_factory import INDEX_TYPES, VECTOR_CODECS
+from project.chunk.strategies import CHUNK_STRATEGIES
 
 from dotenv import load_dotenv
+import argparse
+import shutil
 import os
 import sys
 
@@ -14,27 +19,100 @@ persist_path="faiss_index"
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 load_dotenv()
 
-def faiss_store():
+def faiss_store(full: bool = False, batch_size: int = 256, workers: int = 1,
+                data_path: str = pdf_path, loader_workers: int = 1,
+                index_type: str = "flat", index_params: dict | None = None,
+                nprobe: int | None = None, ef_search: int | None = None, shards: int = 1,
+                chunk_strategy: str | None = None, chunk_size: int | None = None,
+                chunk_overlap: int | None = None):
+    """
+    Incremental (content-hash) index build; full=True re-embeds everything.
+    workers > 1 embeds batches in a pool of CPU worker processes.
 
-    # Load Data
+    data_path is one PDF or a directory of PDFs. Pages stream
+    page -> chunk -> embedding, so memory does not grow with the corpus;
+    loader_workers > 1 parses PDFs in parallel processes.
+
+    index_type: flat | ivf_flat | hnsw | ivf_pq (changing it forces a full rebuild);
+    nprobe / ef_search are stored as query-time defaults. index_params may
+    set codec (float32 | float16 | sq8) and pca_dim to shrink the stored vectors.
+    shards > 1 partitions the index into shards searched in parallel.
+    chunk_strategy / chunk_size / chunk_overlap default to CHUNK_STRATEGY /
+    CHUNK_SIZE / CHUNK_OVERLAP (see project.chunk).
+    """
+
+    # Load Data (lazily, one page at a time)
     print("🔧 Loading Data...")
-    processor = DocumentProcessor(file_path=pdf_path)
-    documents = processor.load_documents()
+    if os.path.isdir(data_path) or loader_workers > 1:
+        processor = DirectoryDocumentProcessor(data_path, workers=loader_workers)
+    else:
+        processor = DocumentProcessor(file_path=data_path)
+    documents = processor.lazy_load_documents()
 
     # 4. Load embedding model
     print("🔄 Loading embeddings...")
-    em_pipe = EmbeddingPipeline(persist_path=persist_path)
+    em_pipe = EmbeddingPipeline(persist_path=persist_path, chunk_strategy=chunk_strategy,
+                                chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    print(f"✂️  Chunking: {em_pipe.chunking}")
+    chunks = em_pipe.iter_split_doc(documents)
 
+    if full:
+        # The live version keeps serving until the new one is published
+        shutil.rmtree(f"{persist_path}.partial", ignore_errors=True)
 
+    # Only new/changed chunks are embedded, interrupted builds resume
+    builder = IncrementalIndexBuilder(
+        em_pipe.embed_model(),
+        persist_path=persist_path,
+        batch_size=batch_size,
+        model_name=em_pipe.model_name,
+        index_type=index_type,
+        index_params=index_params,
+        nprobe=nprobe,
+        ef_search=ef_search,
+        shards=shards
+    )
+    embedder = None
+    if workers > 1:
+        embedder = ParallelEmbedder(em_pipe.model_name, batch_size=batch_size, workers=workers)
+    stats = builder.build(chunks, embedder=embedder, full=full)
 
-    # Firt time run code 
-    em_pipe.create_vector_store(documents)
+    print(f"Faiss Store Completed: {stats}")
 
-    print("Faiss Store Completed")
-
-    return None
+    return stats
 
 if __name__ == "__main__":
-    faiss_store()
-
+    parser = argparse.ArgumentParser(description="Build / update the FAISS index")
+    parser.add_argument("--full", action="store_true", help="re-embed every chunk")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=1, help="embedding worker processes")
+    parser.add_argument("--data", default=pdf_path, help="PDF file or directory of PDFs")
+    parser.add_argument("--loader-workers", type=int, default=1, help="PDF parsing worker processes")
+    parser.add_argument("--index-type", default="flat", choices=INDEX_TYPES)
+    parser.add_argument("--nlist", type=int, default=None, help="IVF lists (default ~4*sqrt(N))")
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--pq-m", type=int, default=None, help="PQ sub-quantizers (must divide dim)")
+    parser.add_argument("--nprobe", type=int, default=None)
+    parser.add_argument("--ef-search", type=int, default=None)
+    parser.add_argument("--vector-codec", default=os.getenv("VECTOR_CODEC", "float32"), choices=VECTOR_CODECS,
+                        help="stored vector precision (ignored by ivf_pq)")
+    parser.add_argument("--pca-dim", type=int, default=int(os.getenv("PCA_DIM", "0")) or None,
+                        help="PCA down-projection trained at build time")
+    parser.add_argument("--chunk-strategy", default=None, choices=CHUNK_STRATEGIES)
+    parser.add_argument("--chunk-size", type=int, default=None, help="in the strategy's unit (chars or tokens)")
+    parser.add_argument("--chunk-overlap", type=int, default=None)
+    parser.add_argument("--shards", type=int, default=int(os.getenv("INDEX_SHARDS", "1")),
+                        help="FAISS shards searched in parallel")
+    args = parser.parse_args()
+    index_params = {"ivf_flat": {"nlist": args.nlist}, "ivf_pq": {"nlist": args.nlist, "pq_m": args.pq_m},
+                    "hnsw": {"hnsw_m": args.hnsw_m}}.get(args.index_type, {})
+    if args.vector_codec != "float32":
+        index_params["codec"] = args.vector_codec
+    if args.pca_dim:
+        index_params["pca_dim"] = args.pca_dim
+    faiss_store(full=args.full, batch_size=args.batch_size, workers=args.workers,
+                data_path=args.data, loader_workers=args.loader_workers,
+                index_type=args.index_type, index_params=index_params,
+                nprobe=args.nprobe, ef_search=args.ef_search, shards=args.shards,
+                chunk_strategy=args.chunk_strategy, chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
 
@@ -0,0 +1,162 @@
+"""
+Context packing for the stuff-documents prompt.
+
+Retrieved chunks arrive best first. Overlapping text between neighbouring
+chunks of the same page (the splitter's chunk_overlap) is dropped, exact
+duplicates are removed, and chunks are added in relevance order until the
+token budget is spent; the last chunk that does not fit is cut at a
+sentence boundary.
+"""
+import math
+import re
+import threading
+from typing import List
+
+from langchain_core.documents import Document
+
+from project.metrics import timed
+
+try:
+    import tiktoken
+except ImportError:  # optional; fall back to ~4 characters per token
+    tiktoken = None
+
+
+SENTENCE_END_RE = re.compile(r"[.!?]\s")
+
+
+class TokenCounter:
+    def __init__(self, encoding: str = "cl100k_base"):
+        self.encoder = None
+        if tiktoken is not None:
+            try:
+                self.encoder = tiktoken.get_encoding(encoding)
+            except Exception:
+                self.encoder = None
+
+    def count(self, text: str) -> int:
+        if self.encoder is not None:
+            return len(self.encoder.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / 4)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if self.encoder is not None:
+            text = self.encoder.decode(self.encoder.encode(text, disallowed_special=())[:max_tokens])
+        else:
+            text = text[:max_tokens * 4]
+        # Prefer ending on a full sentence
+        ends = [m.end() for m in SENTENCE_END_RE.finditer(text)]
+        return text[:ends[-1]].rstrip() if ends and ends[-1] > len(text) // 2 else text
+
+
+def overlap_length(left: str, right: str, min_chars: int = 40, max_chars: int = 400) -> int:
+    """
+    Length of the longest suffix of `left` that is a prefix of `right`
+    """
+    for size in range(min(len(left), len(right), max_chars), min_chars - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+class ContextAssembler:
+    """
+    Deduplicate, order and trim retrieved chunks to a token budget.
+
+    max_tokens   budget for the {context} part of the prompt   (CONTEXT_MAX_TOKENS)
+    min_tokens   smallest tail worth keeping from a cut chunk
+    prompt       prompt template, counted once for the per-request prompt size
+    """
+
+    def __init__(self, max_tokens: int = 1500, min_tokens: int = 64, prompt=None,
+                 encoding: str = "cl100k_base", log: bool = True):
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.counter = TokenCounter(encoding)
+        self.template_tokens = self.counter.count(prompt.template) if prompt is not None else 0
+        self.log = log
+
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.total_prompt_tokens = 0
+        self.total_chunks_in = 0
+        self.total_chunks_out = 0
+
+    # --------------------------------------------------
+    # Dedupe
+    # --------------------------------------------------
+    def dedupe(self, docs: List[Document]) -> List[Document]:
+        kept = []
+        seen = set()
+        for doc in docs:
+            key = doc.metadata.get("content_hash") or doc.page_content
+            if key in seen:
+                continue
+            seen.add(key)
+
+            text = doc.page_content
+            for other in kept:
+                if (other.metadata.get("source"), other.metadata.get("page")) != \
+                        (doc.metadata.get("source"), doc.metadata.get("page")):
+                    continue
+                if text in other.page_content:
+                    text = ""
+                    break
+                # Drop the splitter overlap on whichever side it repeats
+                text = text[overlap_length(other.page_content, text):]
+                cut = overlap_length(text, other.page_content)
+                if cut:
+                    text = text[:-cut]
+            text = text.strip()
+            if text:
+                kept.append(Document(id=doc.id, page_content=text, metadata=doc.metadata))
+        return kept
+
+    # --------------------------------------------------
+    # Pack
+    # --------------------------------------------------
+    def _fit(self, docs: List[Document]):
+        packed = []
+        used = 0
+        for doc in docs:
+            tokens = self.counter.count(doc.page_content)
+            remaining = self.max_tokens - used
+            if tokens > remaining:
+                if remaining >= self.min_tokens:
+                    text = self.counter.truncate(doc.page_content, remaining)
+                    packed.append(Document(id=doc.id, page_content=text, metadata=doc.metadata))
+                    used += self.counter.count(text)
+                break
+            packed.append(doc)
+            used += tokens
+        return packed, used
+
+    def pack(self, docs: List[Document], question: str = "") -> List[Document]:
+        """
+        Chunks for {context}, best first, within max_tokens
+        """
+        with timed("prompt_assembly"):
+            packed, used = self._fit(self.dedupe(docs))
+
+        prompt_tokens = self.template_tokens + self.counter.count(question) + used
+        with self.lock:
+            self.requests += 1
+            self.total_prompt_tokens += prompt_tokens
+            self.total_chunks_in += len(docs)
+            self.total_chunks_out += len(packed)
+        if self.log:
+            print(f"🧾 Prompt tokens: {prompt_tokens} (context {used}/{self.max_tokens}, "
+                  f"{len(packed)}/{len(docs)} chunks)")
+        return packed
+
+    def stats(self) -> dict:
+        with self.lock:
+            n = self.requests
+            return {
+                "requests": n,
+                "avg_prompt_tokens": round(self.total_prompt_tokens / n, 1) if n else 0.0,
+                "avg_chunks_in": round(self.total_chunks_in / n, 2) if n else 0.0,
+                "avg_chunks_out": round(self.total_chunks_out / n, 2) if n else 0.0,
+                "max_context_tokens": self.max_tokens,
+                "tokenizer": "tiktoken" if self.counter.encoder is not None else "chars/4"
+            }
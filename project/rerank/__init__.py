@@ -0,0 +1,170 @@
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Any, List
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from project.metrics import observe
+
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderScorer:
+    """
+    Small CPU cross-encoder scoring (query, chunk) pairs in one batch
+    """
+
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, device: str = "cpu", max_length: int = 512):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.client = CrossEncoder(model_name, device=device, max_length=max_length)
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        pairs = [(query, text) for text in texts]
+        return np.asarray(self.client.predict(pairs, batch_size=len(pairs), show_progress_bar=False))
+
+    def warm_up(self, n_pairs: int = 20):
+        """
+        One untimed batch, so lazy model / kernel setup is not billed to the first request
+        """
+        self.score("warm up", ["warm up"] * n_pairs)
+
+
+class RerankRetriever(BaseRetriever):
+    """
+    Over-fetches `candidates` chunks from the base retriever, re-scores them
+    with the cross-encoder and keeps the top k.
+
+    Re-ranking is skipped (base order kept) when `max_in_flight` re-ranks are
+    already running. The measured cost per pair bounds how many candidates
+    are scored so one re-rank stays within `budget_ms`; if fewer than k fit,
+    the stage is skipped as well. The cost is a plain mean over the first
+    `min_samples` re-ranks and a moving average after that. While over
+    budget the estimate drifts back toward budget_ms / k and every
+    `probe_every`-th request is re-ranked anyway to measure it again.
+    """
+
+    base_retriever: Any
+    scorer: Any
+    search_kwargs: dict = {"k": 3}
+    candidates: int = 20
+    budget_ms: float = 250.0
+    max_in_flight: int = 2
+    min_samples: int = 3
+    probe_every: int = 20
+    counters: dict = {}
+    lock: Any = None
+
+    def model_post_init(self, __context):
+        # Copies made for per-request search_kwargs share the same counters
+        if not self.counters:
+            self.counters = {"reranked": 0, "skipped": 0, "in_flight": 0, "total_ms": 0.0, "pair_ms": None,
+                             "pair_samples": 0, "over_budget": 0}
+        if self.lock is None:
+            self.lock = threading.Lock()
+
+    def _base_side(self):
+        search_kwargs = dict(self.search_kwargs, k=self.candidates)
+        return self.base_retriever.model_copy(update={"search_kwargs": search_kwargs})
+
+    def _admit(self, n_docs: int) -> int:
+        """
+        Number of candidates to score now, 0 to skip re-ranking
+        """
+        k = self.search_kwargs.get("k", 3)
+        with self.lock:
+            if n_docs <= k or self.counters["in_flight"] >= self.max_in_flight:
+                self.counters["skipped"] += 1
+                return 0
+            n = n_docs
+            pair_ms = self.counters["pair_ms"]
+            if self.counters["pair_samples"] >= self.min_samples:
+                n = min(n_docs, int(self.budget_ms / max(pair_ms, 1e-3)))
+            if n < k:
+                self.counters["over_budget"] += 1
+                if self.counters["over_budget"] < self.probe_every:
+                    self.counters["pair_ms"] = 0.9 * pair_ms + 0.1 * self.budget_ms / k
+                    self.counters["skipped"] += 1
+                    return 0
+                # Probe: one re-rank of k candidates refreshes the estimate
+                n = k
+            self.counters["over_budget"] = 0
+            self.counters["in_flight"] += 1
+            return n
+
+    def _rerank(self, query: str, docs: List[Document]) -> List[Document]:
+        k = self.search_kwargs.get("k", 3)
+        n = self._admit(len(docs))
+        if not n:
+            return docs[:k]
+
+        start = time.perf_counter()
+        try:
+            scores = self.scorer.score(query, [doc.page_content for doc in docs[:n]])
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            observe("rerank", elapsed_ms / 1000)
+            with self.lock:
+                self.counters["in_flight"] -= 1
+                self.counters["reranked"] += 1
+                self.counters["total_ms"] += elapsed_ms
+                # Cost of one (query, chunk) pair: mean of the first samples, then a moving average
+                pair_ms = elapsed_ms / n
+                previous = self.counters["pair_ms"]
+                self.counters["pair_samples"] += 1
+                weight = max(1.0 / self.counters["pair_samples"], 0.2)
+                self.counters["pair_ms"] = pair_ms if previous is None else previous + weight * (pair_ms - previous)
+
+        # Copies: with a plain FAISS base retriever these are the docstore's own Documents
+        ranked = []
+        for i in np.argsort(-scores)[:k]:
+            doc = docs[int(i)]
+            ranked.append(Document(id=doc.id, page_content=doc.page_content,
+                                   metadata={**doc.metadata, "rerank_score": round(float(scores[i]), 4)}))
+        return ranked
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self._rerank(query, self._base_side().invoke(query))
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        docs = await self._base_side().ainvoke(query)
+        # The cross-encoder is CPU-bound; keep it off the event loop
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(None, context.run, self._rerank, query, docs)
+
+    def stats(self) -> dict:
+        with self.lock:
+            reranked = self.counters["reranked"]
+            stats = {
+                "rerank": {
+                    "count": reranked,
+                    "skipped": self.counters["skipped"],
+                    "avg_ms": round(self.counters["total_ms"] / reranked, 3) if reranked else 0.0
+                }
+            }
+        if hasattr(self.base_retriever, "stats"):
+            stats.update(self.base_retriever.stats())
+        return stats
+
+
+def load_rerank_retriever(base_retriever, model_name: str = DEFAULT_RERANK_MODEL, k: int = 3,
+                          candidates: int = 20, budget_ms: float = 250.0, max_in_flight: int = 2) -> RerankRetriever:
+    scorer = CrossEncoderScorer(model_name)
+    scorer.warm_up(candidates)
+    return RerankRetriever(
+        base_retriever=base_retriever,
+        scorer=scorer,
+        search_kwargs={"k": k},
+        candidates=candidates,
+        budget_ms=budget_ms,
+        max_in_flight=max_in_flight
+    )
@@ -0,0 +1,390 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from project.store.versions import (
+    LEGACY_VERSION, acquire_lease, current_version, gc_versions, has_index, list_versions, release_lease,
+    version_path
+)
+
+
+class ServerBusy(Exception):
+    """Raised when the chat executor is saturated (mapped to HTTP 429)"""
+
+
+class ChatExecutor:
+    """
+    Runs the retrieval chain through its async API with a bounded
+    number of concurrent executions and a bounded wait queue.
+
+    max_concurrency  chains running at the same time   (CHAT_MAX_CONCURRENCY)
+    max_queue        requests allowed to wait for slot (CHAT_MAX_QUEUE)
+    queue_timeout    seconds a request may wait        (CHAT_QUEUE_TIMEOUT)
+    """
+
+    def __init__(self, max_concurrency: int | None = None, max_queue: int | None = None,
+                 queue_timeout: float | None = None):
+        self.max_concurrency = max_concurrency or int(os.getenv("CHAT_MAX_CONCURRENCY", "8"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("CHAT_MAX_QUEUE", "32"))
+        self.queue_timeout = queue_timeout or float(os.getenv("CHAT_QUEUE_TIMEOUT", "30"))
+        self._semaphore = None
+        self._reserve_lock = None
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    @property
+    def reserve_lock(self) -> asyncio.Lock:
+        if self._reserve_lock is None:
+            self._reserve_lock = asyncio.Lock()
+        return self._reserve_lock
+
+    async def _take(self, slots: int):
+        if slots == 1:
+            await self.semaphore.acquire()
+            return
+        # One multi-slot reservation at a time, so two batches never each hold part of the pool
+        async with self.reserve_lock:
+            taken = 0
+            try:
+                while taken < slots:
+                    await self.semaphore.acquire()
+                    taken += 1
+            except BaseException:
+                for _ in range(taken):
+                    self.semaphore.release()
+                raise
+
+    async def acquire(self, slots: int = 1):
+        """
+        Wait for `slots` concurrency slots (a batch reserves one per LLM call it runs at once)
+        """
+        slots = min(slots, self.max_concurrency)
+        if self.running >= self.max_concurrency and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise ServerBusy("Too many concurrent chat requests, retry later")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._take(slots), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ServerBusy("Timed out waiting for a free chat slot")
+        finally:
+            self.waiting -= 1
+        self.running += slots
+
+    def release(self, slots: int = 1):
+        slots = min(slots, self.max_concurrency)
+        self.running -= slots
+        for _ in range(slots):
+            self.semaphore.release()
+
+    async def run(self, chain, inputs: dict, config: dict | None = None):
+        """
+        Execute chain.ainvoke(inputs) inside a concurrency slot
+        """
+        await self.acquire()
+        try:
+            return await chain.ainvoke(inputs, config=config)
+        finally:
+            self.release()
+
+    def saturated(self) -> bool:
+        return self.running >= self.max_concurrency and self.waiting >= self.max_queue
+
+    async def stream(self, chain, inputs: dict, config: dict | None = None):
+        """
+        Yield chain.astream(inputs) chunks while holding a concurrency slot
+        """
+        await self.acquire()
+        try:
+            async for chunk in chain.astream(inputs, config=config):
+                yield chunk
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "waiting": self.waiting,
+            "rejected": self.rejected
+        }
+
+
+# --------------------------------------------------
+# Request coalescing
+# --------------------------------------------------
+def coalesce_key(question: str, index_version: str, sources=None) -> tuple:
+    """
+    Requests with the same key get the same answer: normalized question,
+    index version and source filter
+    """
+    from project.cache import normalize_question
+
+    return normalize_question(question), index_version, tuple(sorted(sources or ()))
+
+
+class SingleFlight:
+    """
+    Deduplicates identical in-flight computations.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task instead of starting their own. The
+    task is shielded, so a leader that disconnects does not cancel the
+    answer for the followers.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key, work):
+        """
+        Result of work() (a coroutine factory), shared by concurrent callers with the same key
+        """
+        task = self.calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(work())
+            self.calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.followers += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved, even if every waiter went away
+
+    def stats(self) -> dict:
+        total = self.leaders + self.followers
+        return {
+            "in_flight": len(self.calls),
+            "leaders": self.leaders,
+            "coalesced": self.followers,
+            "coalesced_ratio": round(self.followers / total, 4) if total else 0.0
+        }
+
+
+# --------------------------------------------------
+# Index hot-swap
+# --------------------------------------------------
+def _report_gc_error(future):
+    if future.exception() is not None:
+        print(f"❌ Index version cleanup failed: {future.exception()}")
+
+
+class IndexReloader:
+    """
+    Serves the CURRENT index version and swaps in a new chain when it changes.
+
+    build(index_path) runs in a worker thread, so requests keep using the
+    old chain until the new one is ready; install(built) -> chain then makes
+    it the served one on the caller's thread (default: build returns the
+    chain itself). Each request checks out the version it runs against; a
+    replaced version's lease is released once its last request is done and
+    old versions are deleted by a background thread.
+    """
+
+    def __init__(self, root: str, build, keep: int | None = None, install=None):
+        self.root = root
+        self.build = build
+        self.install = install
+        self.keep = keep if keep is not None else int(os.getenv("INDEX_KEEP_VERSIONS", "2"))
+        self.version = None
+        self.chain = None
+        self.inflight = {}
+        self.swaps = 0
+        self.loaded_at = None
+        self.last_error = None
+        self._lock = None
+        self._gc_pool = None
+
+    def _target(self):
+        version = current_version(self.root) or LEGACY_VERSION
+        path = version_path(self.root, version)
+        # Before any lease is taken: acquire_lease creates <root>/leases
+        if not has_index(path):
+            raise FileNotFoundError(
+                f"Vector store '{path}' not found. Build it first: python -m project.pipeline.store_faiss"
+            )
+        return version, path
+
+    def _swap(self, version: str, built):
+        old = self.version
+        chain = self.install(built) if self.install is not None else built
+        self.version, self.chain = version, chain
+        self.loaded_at = time.time()
+        if old is not None and old != version:
+            self.swaps += 1
+            print(f"🔁 Index swapped: {old} -> {version}")
+            self._release_if_idle(old)
+
+    def load(self):
+        """
+        Synchronous first load (server startup)
+        """
+        version, path = self._target()
+        acquire_lease(self.root, version)
+        try:
+            built = self.build(path)
+        except Exception:
+            release_lease(self.root, version)
+            raise
+        self._swap(version, built)
+        return self.chain
+
+    async def reload(self, force: bool = False) -> bool:
+        """
+        Build and swap in the CURRENT version; False when it is already served
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            version, path = self._target()
+            if version == self.version and not force:
+                return False
+            # Lease first, so a builder's gc cannot remove the version while it loads
+            acquire_lease(self.root, version)
+            try:
+                built = await asyncio.get_running_loop().run_in_executor(None, self.build, path)
+            except Exception as e:
+                self.last_error = str(e)
+                if version != self.version:
+                    release_lease(self.root, version)
+                raise
+            self.last_error = None
+            self._swap(version, built)
+            return True
+
+    async def watch(self, interval: float, on_swap=None):
+        """
+        Poll CURRENT every `interval` seconds and reload when it changes
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await self.reload() and on_swap is not None:
+                    on_swap(self.chain)
+            except Exception as e:
+                print(f"❌ Index reload failed: {e}")
+
+    # --------------------------------------------------
+    # In-flight requests per version
+    # --------------------------------------------------
+    def checkout(self) -> str | None:
+        version = self.version
+        self.inflight[version] = self.inflight.get(version, 0) + 1
+        return version
+
+    def checkin(self, version: str | None):
+        self.inflight[version] -= 1
+        self._release_if_idle(version)
+
+    @contextmanager
+    def track(self):
+        version = self.checkout()
+        try:
+            yield version
+        finally:
+            self.checkin(version)
+
+    def _release_if_idle(self, version: str | None):
+        if version is None or version == self.version or self.inflight.get(version):
+            return
+        self.inflight.pop(version, None)
+        release_lease(self.root, version)
+        self._collect()
+
+    def _collect(self):
+        """
+        gc_versions (rmtree of whole index versions) off the event loop, one run at a time
+        """
+        if self._gc_pool is None:
+            self._gc_pool = ThreadPoolExecutor(1, thread_name_prefix="index-gc")
+        self._gc_pool.submit(gc_versions, self.root, self.keep).add_done_callback(_report_gc_error)
+
+    def close(self):
+        if self.version is not None:
+            release_lease(self.root, self.version)
+        if self._gc_pool is not None:
+            self._gc_pool.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "versions": list_versions(self.root),
+            "swaps": self.swaps,
+            "inflight": {str(v): n for v, n in self.inflight.items() if n},
+            "loaded_at": self.loaded_at,
+            "last_error": self.last_error
+        }
+
+
+# --------------------------------------------------
+# Server-Sent Events
+# --------------------------------------------------
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def serialize_sources(documents) -> list:
+    """
+    Citations for the retrieved chunks (page is 1-based for display)
+    """
+    sources = []
+    for doc in documents:
+        metadata = getattr(doc, "metadata", {}) or {}
+        page = metadata.get("page")
+        sources.append({
+            "source": metadata.get("source"),
+            "name": os.path.basename(metadata.get("source") or ""),
+            "page": page + 1 if isinstance(page, int) else page,
+            "start_index": metadata.get("start_index"),
+            "content_hash": metadata.get("content_hash"),
+            "snippet": doc.page_content[:200]
+        })
+    return sources
+
+
+async def stream_chat_events(executor: ChatExecutor, chain, inputs: dict, config: dict | None = None):
+    """
+    SSE stream for one question: a `sources` event as soon as retrieval
+    finishes, one `token` event per LLM token, then `done` (or `error`).
+    """
+    start_time = time.time()
+    first_token = None
+    try:
+        async for chunk in executor.stream(chain, inputs, config=config):
+            if "context" in chunk:
+                yield sse_event("sources", serialize_sources(chunk["context"]))
+            if "answer" in chunk and chunk["answer"]:
+                if first_token is None:
+                    first_token = time.time() - start_time
+                yield sse_event("token", {"token": chunk["answer"]})
+    except ServerBusy as e:
+        yield sse_event("error", {"detail": str(e), "status": 429})
+        return
+    except Exception as e:
+        yield sse_event("error", {"detail": f"Error: {str(e)}", "status": 500})
+        return
+
+    yield sse_event("done", {
+        "processing_time": round(time.time() - start_time, 3),
+        "time_to_first_token": round(first_token, 3) if first_token is not None else None
+    })
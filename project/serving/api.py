@@ -0,0 +1,347 @@
+"""
+Chat API shared by both servers (app.py, main.py): request/response
+models, the /api/* and /metrics routes, and the lifespan that loads the
+chatbot, watches for new index versions and persists the caches.
+
+    app = FastAPI(lifespan=lifespan("Medical ChatAPP Server", [...]))
+    app.include_router(router)
+"""
+import asyncio
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+
+from project.metrics import observe, render_metrics, request_timings
+from project.serving import (
+    ChatExecutor, IndexReloader, ServerBusy, SingleFlight, coalesce_key, serialize_sources, stream_chat_events
+)
+from project.store import list_sources, resolve_sources, retrieval_config
+
+
+# Request/Response models
+class ChatRequest(BaseModel):
+    message: str
+    sources: Optional[List[str]] = None
+    include_timings: bool = False
+
+class ChatResponse(BaseModel):
+    answer: str
+    processing_time: float
+    success: bool
+    sources: List[dict] = []
+    timings: Optional[dict] = None
+
+class BatchChatRequest(BaseModel):
+    messages: List[str]
+    sources: Optional[List[str]] = None
+    max_concurrency: Optional[int] = None
+
+class BatchChatItem(BaseModel):
+    answer: Optional[str] = None
+    success: bool
+    error: Optional[str] = None
+    sources: List[dict] = []
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchChatItem]
+    processing_time: float
+
+
+# Global chatbot
+chatbot = None
+persist_path = "faiss_index"
+
+# Bounded async execution of the chain (CHAT_MAX_CONCURRENCY / CHAT_MAX_QUEUE)
+executor = ChatExecutor()
+
+# Identical concurrent questions share one chain run (CHAT_COALESCE=0 disables it)
+singleflight = SingleFlight()
+
+
+def build_chatbot(index_path: str):
+    """Pipeline over one index version (built in a worker thread on every hot-swap)"""
+    from project.pipeline import build_pipeline
+    return build_pipeline(index_path=index_path)
+
+
+def install_chatbot(pipeline):
+    """Serve a built pipeline; runs on the event loop when the reloader swaps"""
+    from project.pipeline import install
+    return install(pipeline)
+
+# Serves the CURRENT index version of faiss_index/ and hot-swaps new ones
+reloader = IndexReloader(persist_path, build_chatbot, install=install_chatbot)
+
+
+def set_chatbot(chain):
+    global chatbot
+    chatbot = chain
+
+
+def pipeline_startup_report():
+    """Phase timings of the last main_pipeline() run"""
+    pipeline = sys.modules.get("project.pipeline")
+    return getattr(pipeline, "startup_report", None)
+
+
+def query_cache_stats():
+    """Hit ratio and latency saved by the query-embedding cache"""
+    pipeline = sys.modules.get("project.pipeline")
+    query_embeddings = getattr(pipeline, "query_embeddings", None)
+    return query_embeddings.stats() if query_embeddings else None
+
+
+def retrieval_stats():
+    """Per-stage timings of the hybrid retriever (vector, bm25, fusion)"""
+    pipeline = sys.modules.get("project.pipeline")
+    retriever = getattr(pipeline, "retriever", None)
+    return retriever.stats() if hasattr(retriever, "stats") else None
+
+
+def prompt_stats():
+    """Average prompt size after context packing"""
+    pipeline = sys.modules.get("project.pipeline")
+    context_assembler = getattr(pipeline, "context_assembler", None)
+    return context_assembler.stats() if context_assembler else None
+
+
+# --------------------------------------------------
+# Startup / shutdown
+# --------------------------------------------------
+def startup():
+    """Load chatbot on startup (REBUILD_INDEX=1 rebuilds the index first)"""
+    try:
+        if os.getenv("REBUILD_INDEX") == "1":
+            from project.pipeline.store_faiss import faiss_store
+            faiss_store()
+        set_chatbot(reloader.load())
+        print("✅ Chatbot loaded successfully!")
+    except Exception as e:
+        print(f"❌ Failed to load chatbot: {e}")
+        print("💡 Make sure you ran: python -m project.pipeline.store_faiss")
+        set_chatbot(None)
+
+
+def start_index_watcher() -> asyncio.Task | None:
+    """Pick up newly published index versions (INDEX_WATCH_INTERVAL=0 disables it)"""
+    interval = float(os.getenv("INDEX_WATCH_INTERVAL", "10"))
+    if interval > 0 and reloader.version is not None:
+        return asyncio.create_task(reloader.watch(interval, on_swap=set_chatbot))
+    return None
+
+
+def shutdown():
+    """Persist the answer cache and query-embedding cache"""
+    reloader.close()
+    if getattr(chatbot, "cache", None):
+        chatbot.cache.save()
+    pipeline = sys.modules.get("project.pipeline")
+    if getattr(pipeline, "query_embeddings", None):
+        pipeline.query_embeddings.flush()
+
+
+def lifespan(name: str, urls: List[str]):
+    """
+    FastAPI lifespan of a chat server; urls are printed once the chatbot is loaded
+    """
+    @asynccontextmanager
+    async def serve(app):
+        print("=" * 50)
+        print(f"🚀 Starting {name}...")
+        startup()
+        for line in urls:
+            print(line)
+        print("=" * 50)
+
+        watcher = start_index_watcher()
+        try:
+            yield
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            shutdown()
+
+    return serve
+
+
+# --------------------------------------------------
+# API endpoints
+# --------------------------------------------------
+router = APIRouter()
+
+
+@router.get("/api")
+async def api_info():
+    """API information"""
+    return {
+        "name": "Medical ChatAPP API",
+        "version": "1.0.0",
+        "endpoints": {
+            "chat": "POST /api/chat",
+            "chat_stream": "POST /api/chat/stream",
+            "chat_batch": "POST /api/chat/batch",
+            "index_reload": "POST /api/index/reload",
+            "sources": "GET /api/sources",
+            "health": "GET /api/health",
+            "metrics": "GET /metrics",
+            "docs": "GET /docs"
+        },
+        "chatbot_loaded": chatbot is not None
+    }
+
+@router.get("/api/health")
+async def health_check():
+    """Health check endpoint"""
+    return {
+        "status": "healthy" if chatbot else "degraded",
+        "chatbot_loaded": chatbot is not None,
+        "executor": executor.stats(),
+        "coalescing": singleflight.stats(),
+        "index": reloader.stats(),
+        "cache": chatbot.cache.stats() if getattr(chatbot, "cache", None) else None,
+        "query_cache": query_cache_stats(),
+        "retrieval": retrieval_stats(),
+        "prompt": prompt_stats(),
+        "startup": pipeline_startup_report(),
+        "timestamp": time.time()
+    }
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Per-stage latency histograms and cache counters (Prometheus text format)"""
+    return render_metrics(
+        answer_cache=chatbot.cache.stats() if getattr(chatbot, "cache", None) else None,
+        query_cache=query_cache_stats(),
+        executor=executor.stats()
+    )
+
+@router.post("/api/index/reload")
+async def reload_index_endpoint(force: bool = False):
+    """Load the CURRENT index version in the background and swap it in"""
+    try:
+        swapped = await reloader.reload(force=force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed: {str(e)}")
+    if swapped:
+        set_chatbot(reloader.chain)
+    return {"swapped": swapped, **reloader.stats()}
+
+def request_config(request: ChatRequest | BatchChatRequest):
+    """Retriever config restricting the search to the requested sources"""
+    if not request.sources:
+        return None
+    return retrieval_config(resolve_sources(request.sources, persist_path))
+
+@router.get("/api/sources")
+async def sources_endpoint():
+    """Indexed documents, usable as the `sources` filter of /api/chat"""
+    return {"sources": list_sources(persist_path)}
+
+async def run_chat(request: ChatRequest):
+    """One chain run per distinct in-flight (question, index version, sources)"""
+    def work():
+        return executor.run(chatbot, {"input": request.message}, request_config(request))
+
+    with reloader.track() as version:
+        if os.getenv("CHAT_COALESCE", "1") == "0":
+            return await work()
+        key = coalesce_key(request.message, version, request.sources)
+        return await singleflight.do(key, work)
+
+@router.post("/api/chat", response_model=ChatResponse)
+async def chat_endpoint(request: ChatRequest):
+    """Chat with the ML chatbot"""
+    start_time = time.time()
+
+    if not chatbot:
+        return ChatResponse(
+            answer="Chatbot not loaded. Please check server logs.",
+            processing_time=time.time() - start_time,
+            success=False
+        )
+
+    try:
+        with request_timings() as timings:
+            response = await run_chat(request)
+        processing_time = time.time() - start_time
+        observe("chat_total", processing_time)
+        return ChatResponse(
+            answer=response["answer"],
+            processing_time=round(processing_time, 3),
+            success=True,
+            sources=serialize_sources(response.get("context", [])),
+            timings=timings if request.include_timings else None
+        )
+    except ServerBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+@router.post("/api/chat/batch", response_model=BatchChatResponse)
+async def chat_batch_endpoint(request: BatchChatRequest):
+    """Answer a list of questions with one embedding pass and one FAISS search"""
+    from project.pipeline import abatch_answer
+
+    start_time = time.time()
+    if not chatbot:
+        raise HTTPException(status_code=503, detail="Chatbot not loaded. Please check server logs.")
+    max_batch = int(os.getenv("CHAT_MAX_BATCH", "256"))
+    if len(request.messages) > max_batch:
+        raise HTTPException(status_code=413, detail=f"At most {max_batch} messages per batch")
+
+    config = request_config(request)
+    search_kwargs = config["configurable"]["search_kwargs"] if config else None
+    max_concurrency = min(request.max_concurrency or executor.max_concurrency, executor.max_concurrency)
+    try:
+        # One executor slot per LLM call the batch runs at once
+        slots = max(1, min(len(request.messages), max_concurrency))
+        await executor.acquire(slots)
+        try:
+            with reloader.track():
+                results = await abatch_answer(request.messages, search_kwargs, slots)
+        finally:
+            executor.release(slots)
+    except ServerBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+    return BatchChatResponse(
+        results=[
+            BatchChatItem(
+                answer=item["answer"],
+                success=item["error"] is None,
+                error=item["error"],
+                sources=serialize_sources(item["context"])
+            )
+            for item in results
+        ],
+        processing_time=round(time.time() - start_time, 3)
+    )
+
+@router.post("/api/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Stream sources, then answer tokens, as Server-Sent Events"""
+    if not chatbot:
+        raise HTTPException(status_code=503, detail="Chatbot not loaded. Please check server logs.")
+    if executor.saturated():
+        raise HTTPException(status_code=429, detail="Too many concurrent chat requests, retry later",
+                            headers={"Retry-After": "1"})
+
+    async def events():
+        with reloader.track():
+            async for event in stream_chat_events(executor, chatbot, {"input": request.message},
+                                                  request_config(request)):
+                yield event
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
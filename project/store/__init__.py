@@ -1,6 +1,117 @@
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 from typing import List
+import json
+import os
+import shutil
+
+from project.store.index_factory import apply_search_params
+from project.store.bm25 import build_bm25_index
+from project.store.mmap_store import MmapFaissRetriever, export_chunks_db, has_mmap_store, load_mmap_retriever
+from project.store.sharded import has_shards, load_sharded_retriever, write_shards
+from project.store.versions import gc_versions, publish_version, resolve_index_path
+
+
+METADATA_INDEX = "metadata.json"
+METADATA_FIELDS = ("source", "page", "start_index", "chunk", "content_hash")
+
+
+# --------------------------------------------------
+# Chunk metadata side index (faiss_index/metadata.json)
+# --------------------------------------------------
+def write_metadata_index(vector_store: FAISS, persist_path: str):
+    """
+    Compact docstore-id -> [source_no, page, start_index, chunk, content_hash]
+    table saved next to the FAISS files, with sources stored once
+    """
+    sources = {}
+    chunks = {}
+    for doc_id in vector_store.index_to_docstore_id.values():
+        doc = vector_store.docstore.search(doc_id)
+        metadata = getattr(doc, "metadata", None) or {}
+        source_no = sources.setdefault(metadata.get("source"), len(sources))
+        chunks[doc_id] = [source_no] + [metadata.get(field) for field in METADATA_FIELDS[1:]]
+
+    with open(os.path.join(persist_path, METADATA_INDEX), "w") as f:
+        json.dump({"fields": METADATA_FIELDS, "sources": list(sources), "chunks": chunks}, f)
+
+
+def load_metadata_index(persist_path: str) -> dict | None:
+    path = os.path.join(resolve_index_path(persist_path), METADATA_INDEX)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def list_sources(persist_path: str) -> List[dict]:
+    """
+    Indexed sources with their chunk counts
+    """
+    index = load_metadata_index(persist_path)
+    if index is None:
+        return []
+    counts = [0] * len(index["sources"])
+    for row in index["chunks"].values():
+        counts[row[0]] += 1
+    return [
+        {"source": source, "name": os.path.basename(source or ""), "chunks": count}
+        for source, count in zip(index["sources"], counts)
+    ]
+
+
+def resolve_sources(requested: List[str], persist_path: str) -> List[str]:
+    """
+    Map requested names (full path or file name) to indexed source values
+    """
+    known = [item["source"] for item in list_sources(persist_path)]
+    resolved = []
+    for name in requested:
+        matches = [s for s in known if s == name or os.path.basename(s or "") == name]
+        resolved.extend(matches or [name])
+    return resolved
+
+
+def retrieval_config(sources: List[str] | None = None, k: int = 3, fetch_k: int = 50) -> dict | None:
+    """
+    Per-request RunnableConfig for the configurable retriever built by
+    main_pipeline: restricts the similarity search to the given sources
+    """
+    if not sources:
+        return None
+    return {"configurable": {"search_kwargs": {"k": k, "fetch_k": fetch_k, "filter": {"source": sources}}}}
+
+
+# --------------------------------------------------
+# Writing an index version
+# --------------------------------------------------
+def write_index_files(vector_store: FAISS, path: str, shards: int = 1):
+    """
+    FAISS files, metadata side index, chunks db (or shards) and BM25 index of a built store
+    """
+    vector_store.save_local(path)
+    write_metadata_index(vector_store, path)
+    if shards > 1:
+        write_shards(vector_store, path, shards)
+    else:
+        export_chunks_db(vector_store, path)
+    build_bm25_index(vector_store, path)
+
+
+def publish_vector_store(vector_store: FAISS, persist_path: str, shards: int = 1) -> str:
+    """
+    Write a built store to a staging directory and publish it as the CURRENT
+    version; writing into persist_path itself would be ignored (and later
+    removed by gc) once a version is live
+    """
+    staging_path = f"{persist_path}.staging"
+    shutil.rmtree(staging_path, ignore_errors=True)
+    write_index_files(vector_store, staging_path, shards)
+    os.makedirs(persist_path, exist_ok=True)
+    version = publish_version(persist_path, staging_path)
+    gc_versions(persist_path, keep=int(os.getenv("INDEX_KEEP_VERSIONS", "2")))
+    return version
+
 
 class VectorStorePipeline:
 
@@ -9,20 +120,32 @@ class VectorStorePipeline:
 
     def store(self, docs: List[Document], embedding):
         """
-        Store documents into FAISS and save locally
+        Store documents into FAISS and publish them as a new index version
         """
         vector_store = FAISS.from_documents(docs, embedding)
-        vector_store.save_local(self.persist_path)
+        publish_vector_store(vector_store, self.persist_path)
 
     def load_retriever(self, embedding, k: int = 3):
         """
-        Load FAISS index and return retriever
+        Load FAISS index and return retriever.
+
+        Uses the pickle-free mmap format (index.faiss + chunks.sqlite) when
+        present, unless INDEX_FORMAT=pickle. Sharded indexes are searched
+        shard-parallel. Versioned indexes open CURRENT.
         """
+        path = resolve_index_path(self.persist_path)
+        if os.getenv("INDEX_FORMAT", "mmap") != "pickle":
+            if has_shards(path):
+                return load_sharded_retriever(path, embedding, k=k)
+            if has_mmap_store(path):
+                return load_mmap_retriever(path, embedding, k=k)
+
         vector_store = FAISS.load_local(
-            self.persist_path,
+            path,
             embedding,
             allow_dangerous_deserialization=True
         )
+        apply_search_params(vector_store.index, path)
         return vector_store.as_retriever(
             search_type="similarity",
             search_kwargs={"k": k}
@@ -32,4 +155,35 @@ class VectorStorePipeline:
         """
         Similarity search with score
         """
+        if isinstance(retriever, MmapFaissRetriever):
+            vector = retriever.embedding.embed_query(query)
+            return [(doc, doc.metadata["score"]) for doc in retriever.store.search_by_vector(vector, k=k)]
         return retriever.vectorstore.similarity_search_with_score(query, k=k)
+
+
+class ShardedVectorStorePipeline(VectorStorePipeline):
+    """
+    VectorStorePipeline whose chunks are partitioned into `shards` FAISS
+    indexes at build time; queries fan out over the shards in parallel
+    (mode="thread" or "process") and the per-shard top-k are merged.
+    """
+
+    def __init__(self, persist_path: str = "faiss_index", shards: int = 4, mode: str | None = None,
+                 workers: int | None = None):
+        super().__init__(persist_path)
+        self.shards = shards
+        self.mode = mode
+        self.workers = workers
+
+    def store(self, docs: List[Document], embedding):
+        """
+        Store documents into FAISS, split the index into shards and publish it as a new version
+        """
+        vector_store = FAISS.from_documents(docs, embedding)
+        publish_vector_store(vector_store, self.persist_path, shards=self.shards)
+
+    def load_retriever(self, embedding, k: int = 3):
+        path = resolve_index_path(self.persist_path)
+        if not has_shards(path):
+            return super().load_retriever(embedding, k=k)
+        return load_sharded_retriever(path, embedding, k=k, mode=self.mode, workers=self.workers)
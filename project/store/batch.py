@@ -0,0 +1,54 @@
+"""
+Batched retrieval: one FAISS search over the whole query matrix instead of
+one search per question, through the same retriever stack main_pipeline()
+builds (vector store, optional BM25 fusion, optional re-ranking).
+"""
+from typing import Any, Dict, List
+
+import numpy as np
+from langchain_core.documents import Document
+
+from project.metrics import timed
+from project.rerank import RerankRetriever
+from project.store.hybrid import HybridRetriever
+from project.store.mmap_store import MmapFaissRetriever, matches_filter
+
+
+def faiss_search_batch(vector_store, vectors, k: int = 3, filter: Dict[str, Any] | None = None,
+                       fetch_k: int = 50, **kwargs) -> List[List[Document]]:
+    """
+    search_by_vectors for a LangChain FAISS store (INDEX_FORMAT=pickle)
+    """
+    with timed("faiss_search_batch"):
+        _, positions = vector_store.index.search(np.asarray(vectors, dtype="float32"), fetch_k if filter else k)
+    results = []
+    for row in positions:
+        docs = []
+        for pos in row.tolist():
+            doc_id = vector_store.index_to_docstore_id.get(pos)
+            if doc_id is None:
+                continue
+            doc = vector_store.docstore.search(doc_id)
+            if filter and not matches_filter(doc.metadata, filter):
+                continue
+            docs.append(Document(id=doc_id, page_content=doc.page_content, metadata=dict(doc.metadata)))
+        results.append(docs[:k])
+    return results
+
+
+def search_batch(retriever, queries: List[str], vectors) -> List[List[Document]]:
+    """
+    Documents per query, in order; vectors are the query embeddings (one row per query)
+    """
+    if isinstance(retriever, RerankRetriever):
+        candidates = search_batch(retriever._base_side(), queries, vectors)
+        return [retriever._rerank(query, docs) for query, docs in zip(queries, candidates)]
+
+    if isinstance(retriever, HybridRetriever):
+        vector_docs = search_batch(retriever._vector_side(), queries, vectors)
+        return [retriever._fuse(docs, retriever._keyword_side(query)) for query, docs in zip(queries, vector_docs)]
+
+    if isinstance(retriever, MmapFaissRetriever):
+        return retriever.store.search_by_vectors(vectors, **retriever.search_kwargs)
+
+    return faiss_search_batch(retriever.vectorstore, vectors, **retriever.search_kwargs)
@@ -0,0 +1,132 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+
+BM25_ARRAYS = "bm25.npz"
+BM25_VOCAB = "bm25_vocab.json"
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were "
+    "what which who with how why when does do can".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over chunk positions with precomputed postings.
+
+    Postings are stored CSR-style (indptr / doc_ids / weights) with the
+    full BM25 term weight already computed, so a query is a few array
+    slices plus one np.bincount.
+    """
+
+    def __init__(self, vocab: dict, indptr: np.ndarray, doc_ids: np.ndarray, weights: np.ndarray, n_docs: int):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.n_docs = n_docs
+
+    @classmethod
+    def build(cls, docs: Iterable[Tuple[int, str]], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """
+        docs: (index position, text) pairs
+        """
+        postings = {}
+        lengths = {}
+        for position, text in docs:
+            counts = Counter(tokenize(text))
+            lengths[position] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((position, tf))
+
+        n_docs = max(lengths) + 1 if lengths else 0
+        avgdl = (sum(lengths.values()) / len(lengths)) if lengths else 1.0
+        doc_len = np.zeros(n_docs, dtype="float32")
+        for position, length in lengths.items():
+            doc_len[position] = length
+
+        vocab = {}
+        indptr = [0]
+        doc_ids = []
+        weights = []
+        for term_id, (term, plist) in enumerate(sorted(postings.items())):
+            vocab[term] = term_id
+            df = len(plist)
+            idf = math.log(1 + (len(lengths) - df + 0.5) / (df + 0.5))
+            ids = np.array([p for p, _ in plist], dtype="int32")
+            tf = np.array([t for _, t in plist], dtype="float32")
+            norm = k1 * (1 - b + b * doc_len[ids] / avgdl)
+            doc_ids.append(ids)
+            weights.append((idf * tf * (k1 + 1) / (tf + norm)).astype("float32"))
+            indptr.append(indptr[-1] + len(ids))
+
+        return cls(
+            vocab,
+            np.array(indptr, dtype="int64"),
+            np.concatenate(doc_ids) if doc_ids else np.zeros(0, dtype="int32"),
+            np.concatenate(weights) if weights else np.zeros(0, dtype="float32"),
+            n_docs
+        )
+
+    def search(self, query: str, k: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k (positions, scores) for the query, best first
+        """
+        term_ids = [self.vocab[t] for t in set(tokenize(query)) if t in self.vocab]
+        if not term_ids:
+            return np.zeros(0, dtype="int64"), np.zeros(0, dtype="float32")
+        ids = np.concatenate([self.doc_ids[self.indptr[t]:self.indptr[t + 1]] for t in term_ids])
+        weights = np.concatenate([self.weights[self.indptr[t]:self.indptr[t + 1]] for t in term_ids])
+        scores = np.bincount(ids, weights=weights, minlength=self.n_docs)
+
+        k = min(k, np.count_nonzero(scores))
+        if k == 0:
+            return np.zeros(0, dtype="int64"), np.zeros(0, dtype="float32")
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top, scores[top]
+
+    # --------------------------------------------------
+    # Persistence (next to index.faiss)
+    # --------------------------------------------------
+    def save(self, persist_path: str):
+        np.savez(os.path.join(persist_path, BM25_ARRAYS), indptr=self.indptr, doc_ids=self.doc_ids,
+                 weights=self.weights, n_docs=np.array([self.n_docs]))
+        with open(os.path.join(persist_path, BM25_VOCAB), "w") as f:
+            json.dump(self.vocab, f)
+
+    @classmethod
+    def load(cls, persist_path: str) -> "BM25Index":
+        arrays = np.load(os.path.join(persist_path, BM25_ARRAYS))
+        with open(os.path.join(persist_path, BM25_VOCAB)) as f:
+            vocab = json.load(f)
+        return cls(vocab, arrays["indptr"], arrays["doc_ids"], arrays["weights"], int(arrays["n_docs"][0]))
+
+    @staticmethod
+    def exists(persist_path: str) -> bool:
+        return os.path.exists(os.path.join(persist_path, BM25_ARRAYS))
+
+
+def build_bm25_index(vector_store, persist_path: str) -> BM25Index:
+    """
+    Build and save the keyword index for every chunk of a LangChain FAISS store
+    """
+    docs = (
+        (int(pos), vector_store.docstore.search(doc_id).page_content)
+        for pos, doc_id in vector_store.index_to_docstore_id.items()
+    )
+    index = BM25Index.build(docs)
+    index.save(persist_path)
+    return index
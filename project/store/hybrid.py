@@ -0,0 +1,149 @@
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Any, Callable, List
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from project.metrics import observe
+from project.store.bm25 import BM25Index
+from project.store.mmap_store import MmapFaissRetriever, matches_filter
+
+
+def document_fetcher(retriever) -> Callable[[List[int]], List[Document]]:
+    """
+    positions -> Documents, for either retriever type load_retriever() returns
+    """
+    if isinstance(retriever, MmapFaissRetriever):
+        return retriever.store.get_documents
+
+    vector_store = retriever.vectorstore
+
+    def fetch(positions: List[int]) -> List[Document]:
+        docs = []
+        for pos in positions:
+            doc_id = vector_store.index_to_docstore_id.get(int(pos))
+            if doc_id is not None:
+                doc = vector_store.docstore.search(doc_id)
+                docs.append(Document(id=doc_id, page_content=doc.page_content, metadata=dict(doc.metadata)))
+        return docs
+
+    return fetch
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], rrf_k: int = 60) -> List[Document]:
+    """
+    score(d) = sum over lists of 1 / (rrf_k + rank)
+    """
+    scores = {}
+    docs = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = doc.id or doc.metadata.get("content_hash") or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    # Copies: the inputs may be the docstore's own (shared) Documents
+    return [
+        Document(id=docs[key].id, page_content=docs[key].page_content,
+                 metadata={**docs[key].metadata, "rrf_score": round(scores[key], 6)})
+        for key in ranked
+    ]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Vector + BM25 retrieval merged with reciprocal-rank fusion.
+
+    Each side contributes `candidates` results; the fused top k is returned.
+    search_kwargs (k / fetch_k / filter) is configurable per request like the
+    plain retrievers; the filter is applied to both sides. Per-stage timings
+    are accumulated in `timings` (vector, bm25, fusion).
+    """
+
+    vector_retriever: Any
+    bm25: Any
+    fetch_documents: Any
+    search_kwargs: dict = {"k": 3}
+    candidates: int = 20
+    rrf_k: int = 60
+    timings: dict = {}
+    lock: Any = None
+
+    def model_post_init(self, __context):
+        # Copies made for per-request search_kwargs share the same counters
+        if not self.timings:
+            self.timings = {stage: {"count": 0, "total_ms": 0.0} for stage in ("vector", "bm25", "fusion")}
+        if self.lock is None:
+            self.lock = threading.Lock()
+
+    def _record(self, stage: str, seconds: float):
+        observe("vector_search" if stage == "vector" else stage, seconds)
+        with self.lock:
+            self.timings[stage]["count"] += 1
+            self.timings[stage]["total_ms"] += seconds * 1000
+
+    def _vector_side(self):
+        search_kwargs = dict(self.search_kwargs, k=self.candidates)
+        return self.vector_retriever.model_copy(update={"search_kwargs": search_kwargs})
+
+    def _keyword_side(self, query: str) -> List[Document]:
+        start = time.perf_counter()
+        limit = self.candidates * 4 if self.search_kwargs.get("filter") else self.candidates
+        positions, _ = self.bm25.search(query, k=limit)
+        docs = self.fetch_documents(positions.tolist())
+        if self.search_kwargs.get("filter"):
+            docs = [d for d in docs if matches_filter(d.metadata, self.search_kwargs["filter"])]
+        self._record("bm25", time.perf_counter() - start)
+        return docs[:self.candidates]
+
+    def _fuse(self, vector_docs: List[Document], keyword_docs: List[Document]) -> List[Document]:
+        start = time.perf_counter()
+        fused = reciprocal_rank_fusion([vector_docs, keyword_docs], self.rrf_k)
+        self._record("fusion", time.perf_counter() - start)
+        return fused[:self.search_kwargs.get("k", 3)]
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        start = time.perf_counter()
+        vector_docs = self._vector_side().invoke(query)
+        self._record("vector", time.perf_counter() - start)
+        return self._fuse(vector_docs, self._keyword_side(query))
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        async def vector_side():
+            start = time.perf_counter()
+            docs = await self._vector_side().ainvoke(query)
+            self._record("vector", time.perf_counter() - start)
+            return docs
+
+        loop = asyncio.get_running_loop()
+        vector_docs, keyword_docs = await asyncio.gather(
+            vector_side(),
+            loop.run_in_executor(None, contextvars.copy_context().run, self._keyword_side, query)
+        )
+        return self._fuse(vector_docs, keyword_docs)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                stage: {
+                    "count": t["count"],
+                    "avg_ms": round(t["total_ms"] / t["count"], 3) if t["count"] else 0.0
+                }
+                for stage, t in self.timings.items()
+            }
+
+
+def load_hybrid_retriever(persist_path: str, vector_retriever, k: int = 3, candidates: int = 20) -> HybridRetriever:
+    return HybridRetriever(
+        vector_retriever=vector_retriever,
+        bm25=BM25Index.load(persist_path),
+        fetch_documents=document_fetcher(vector_retriever),
+        search_kwargs={"k": k},
+        candidates=candidates
+    )
@@ -0,0 +1,265 @@
+import json
+import os
+import shutil
+import time
+from typing import Iterable, List
+
+import faiss
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from project.chunk import content_hash
+from project.store import write_index_files
+from project.store.index_factory import (
+    DEFAULT_TRAIN_SIZE, TrainingSpool, empty_vector_store, needs_training, write_index_config
+)
+from project.store.versions import gc_versions, publish_version, resolve_index_path
+from project.timing import peak_rss_mb
+
+
+MANIFEST_NAME = "manifest.json"
+SCHEME = "content-hash-v1"
+
+
+def chunk_hash(doc: Document) -> str:
+    """
+    Stable id of a chunk: sha256 of its source and text
+    """
+    metadata = doc.metadata or {}
+    return metadata.get("content_hash") or content_hash(metadata.get("source", ""), doc.page_content)
+
+
+class IncrementalIndexBuilder:
+    """
+    Content-hash based, resumable FAISS builds.
+
+    Every chunk is stored under its chunk_hash as docstore id, so a rebuild
+    only embeds new/changed chunks and deletes chunks that disappeared.
+    Progress is checkpointed to <persist_path>.partial every
+    checkpoint_every batches; an interrupted build resumes from there.
+
+    index_type selects the FAISS structure (flat, ivf_flat, hnsw, ivf_pq, see
+    project.store.index_factory); a first build of a trained type spools its
+    batches to <persist_path>.spool and trains on a uniform train_size sample
+    of the whole corpus. nprobe / ef_search are saved as query-time defaults.
+    index_params may also set codec (float32 | float16 | sq8) and pca_dim;
+    changing either forces a full rebuild.
+
+    shards > 1 also partitions the published index into shard indexes
+    (project.store.sharded) that are searched in parallel; changing the
+    shard count re-partitions without re-embedding.
+    """
+
+    def __init__(self, embedding, persist_path: str = "faiss_index", batch_size: int = 256,
+                 checkpoint_every: int = 10, model_name: str | None = None,
+                 index_type: str = "flat", index_params: dict | None = None,
+                 train_size: int = DEFAULT_TRAIN_SIZE, nprobe: int | None = None, ef_search: int | None = None,
+                 shards: int = 1):
+        self.embedding = embedding
+        self.persist_path = persist_path
+        self.partial_path = f"{persist_path}.partial"
+        self.spool_path = f"{persist_path}.spool"
+        self.batch_size = batch_size
+        self.checkpoint_every = checkpoint_every
+        self.model_name = model_name
+        self.index_type = index_type
+        self.index_params = index_params or {}
+        self.train_size = train_size
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.trained = needs_training(index_type, self.index_params)
+        self.shards = shards
+
+    # --------------------------------------------------
+    # Manifest
+    # --------------------------------------------------
+    def read_manifest(self, path: str) -> dict | None:
+        manifest_path = os.path.join(path, MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    def write_manifest(self, path: str, vector_store: FAISS, status: str):
+        manifest = {
+            "scheme": SCHEME,
+            "model": self.model_name,
+            "index_type": self.index_type,
+            "codec": self.index_params.get("codec", "float32"),
+            "pca_dim": self.index_params.get("pca_dim"),
+            "status": status,
+            "chunks": len(vector_store.index_to_docstore_id),
+            "updated": time.time()
+        }
+        with open(os.path.join(path, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    def _compatible(self, manifest: dict | None) -> bool:
+        return (bool(manifest) and manifest.get("scheme") == SCHEME and manifest.get("model") == self.model_name
+                and manifest.get("index_type", "flat") == self.index_type
+                and manifest.get("codec", "float32") == self.index_params.get("codec", "float32")
+                and manifest.get("pca_dim") == self.index_params.get("pca_dim"))
+
+    def load_existing(self):
+        """
+        Resume from a checkpoint if one exists, else start from the live index.
+        Indexes without a compatible manifest (legacy uuid ids, other model) are ignored.
+        """
+        for path in (self.partial_path, resolve_index_path(self.persist_path)):
+            if os.path.exists(os.path.join(path, "index.faiss")) and self._compatible(self.read_manifest(path)):
+                print(f"🔄 Starting from existing index: {path}")
+                return FAISS.load_local(path, self.embedding, allow_dangerous_deserialization=True)
+        return None
+
+    def checkpoint(self, vector_store: FAISS):
+        vector_store.save_local(self.partial_path)
+        self.write_manifest(self.partial_path, vector_store, "in_progress")
+
+    def _delete(self, vector_store: FAISS, removed: List[str]) -> FAISS:
+        if not self.trained:
+            vector_store.delete(removed)
+            return vector_store
+
+        # IVF keeps its original labels and HNSW cannot remove ids, so re-add
+        # the remaining vectors to an empty copy of the already trained index
+        index = vector_store.index
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.make_direct_map()
+        removed = set(removed)
+        keep = [(pos, doc_id) for pos, doc_id in sorted(vector_store.index_to_docstore_id.items())
+                if doc_id not in removed]
+        vectors = [index.reconstruct(int(pos)).tolist() for pos, _ in keep]
+        docs = [vector_store.docstore.search(doc_id) for _, doc_id in keep]
+
+        trained = faiss.clone_index(index)
+        trained.reset()
+        rebuilt = empty_vector_store(self.embedding, trained)
+        if keep:
+            rebuilt.add_embeddings(list(zip([d.page_content for d in docs], vectors)),
+                                   metadatas=[d.metadata for d in docs], ids=[doc_id for _, doc_id in keep])
+        return rebuilt
+
+    # --------------------------------------------------
+    # Build
+    # --------------------------------------------------
+    def _embed(self, new_chunks: Iterable[Document], embedder=None):
+        """
+        Yield (ids, docs, vectors) batches, in-process or via a ParallelEmbedder
+        """
+        if embedder is None:
+            batch = []
+            for doc in new_chunks:
+                batch.append(doc)
+                if len(batch) == self.batch_size:
+                    yield self._ids(batch), batch, self.embedding.embed_documents([d.page_content for d in batch])
+                    batch = []
+            if batch:
+                yield self._ids(batch), batch, self.embedding.embed_documents([d.page_content for d in batch])
+            return
+
+        embedder.batch_size = self.batch_size
+        for docs, vectors in embedder.embed_batches(new_chunks):
+            yield self._ids(docs), docs, vectors.tolist()
+
+    @staticmethod
+    def _ids(docs: List[Document]) -> List[str]:
+        return [doc.metadata["content_hash"] for doc in docs]
+
+    def build(self, chunks: Iterable[Document], embedder=None, full: bool = False) -> dict:
+        """
+        Sync the index with chunks; pass a ParallelEmbedder to spread
+        embedding over worker processes. full=True ignores the live index
+        and re-embeds everything (the live version keeps serving meanwhile).
+
+        chunks may be a generator: only the set of seen hashes is kept in
+        memory, new chunks go straight to the embedder in batches.
+        """
+        start = time.time()
+        vector_store = None if full else self.load_existing()
+        existing = set(vector_store.index_to_docstore_id.values()) if vector_store else set()
+        seen = set()
+        counts = {"chunks": 0, "embedded": 0}
+
+        def new_chunks():
+            for doc in chunks:
+                h = chunk_hash(doc)
+                if h in seen:
+                    continue
+                seen.add(h)
+                counts["chunks"] += 1
+                if h in existing:
+                    continue
+                yield Document(page_content=doc.page_content, metadata=dict(doc.metadata, content_hash=h))
+
+        embed_start = time.time()
+        # A new trained index waits for the whole corpus (no checkpoints until then)
+        spool = TrainingSpool(self.spool_path, self.train_size) if vector_store is None and self.trained else None
+        for batch_no, (ids, docs, vectors) in enumerate(self._embed(new_chunks(), embedder), start=1):
+            texts = [doc.page_content for doc in docs]
+            metadatas = [doc.metadata for doc in docs]
+            counts["embedded"] += len(ids)
+            print(f"   batch {batch_no}: {counts['embedded']} chunks embedded")
+
+            if spool is not None:
+                spool.add(texts, vectors, metadatas, ids)
+                continue
+            if vector_store is None:
+                vector_store = FAISS.from_embeddings(list(zip(texts, vectors)), self.embedding,
+                                                     metadatas=metadatas, ids=ids)
+            else:
+                vector_store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+            if batch_no % self.checkpoint_every == 0:
+                self.checkpoint(vector_store)
+
+        if spool is not None:
+            if spool.seen:
+                vector_store = spool.build(self.embedding, self.index_type, **self.index_params)
+            spool.close()
+        embed_seconds = time.time() - embed_start
+
+        if embedder is not None and counts["embedded"]:
+            embedder.print_report()
+
+        removed = [h for h in existing if h not in seen]
+        if vector_store is not None and removed:
+            vector_store = self._delete(vector_store, removed)
+
+        if vector_store is None or not seen:
+            raise ValueError("No chunks to index")
+
+        print(f"📊 {counts['chunks']} chunks: {len(existing) - len(removed)} unchanged, "
+              f"{counts['embedded']} embedded, {len(removed)} deleted")
+
+        self.publish(vector_store)
+        return {
+            "chunks": counts["chunks"],
+            "embedded": counts["embedded"],
+            "deleted": len(removed),
+            "unchanged": len(existing) - len(removed),
+            "seconds": round(time.time() - start, 3),
+            "chunks_per_sec": round(counts["embedded"] / embed_seconds, 2) if counts["embedded"] and embed_seconds else 0.0,
+            "peak_rss_mb": peak_rss_mb(),
+            "embedder": embedder.stats if embedder is not None else None
+        }
+
+    def publish(self, vector_store: FAISS):
+        """
+        Write the finished index as a new version, then point CURRENT at it
+        """
+        staging_path = f"{self.persist_path}.staging"
+        shutil.rmtree(staging_path, ignore_errors=True)
+        write_index_files(vector_store, staging_path, self.shards)
+        write_index_config(staging_path, {
+            "index_type": self.index_type,
+            "index_params": self.index_params,
+            "nprobe": self.nprobe,
+            "ef_search": self.ef_search,
+            "shards": self.shards
+        })
+        self.write_manifest(staging_path, vector_store, "complete")
+
+        os.makedirs(self.persist_path, exist_ok=True)
+        publish_version(self.persist_path, staging_path)
+        shutil.rmtree(self.partial_path, ignore_errors=True)
+        gc_versions(self.persist_path, keep=int(os.getenv("INDEX_KEEP_VERSIONS", "2")))
@@ -0,0 +1,195 @@
+import json
+import math
+import os
+import pickle
+import shutil
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+
+INDEX_CONFIG = "index_config.json"
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+DEFAULT_TRAIN_SIZE = 20000
+
+# How vectors are stored: 4, 2 or 1 byte(s) per dimension (ivf_pq has its own PQ codes)
+VECTOR_CODECS = ("float32", "float16", "sq8")
+_SQ_CODES = {"float16": "SQfp16", "sq8": "SQ8"}
+
+
+def default_nlist(n_vectors: int) -> int:
+    """
+    ~4*sqrt(N) inverted lists, with at least 39 training points per list
+    """
+    return max(1, min(int(4 * math.sqrt(max(n_vectors, 1))), n_vectors // 39))
+
+
+def index_spec(index_type: str, dim: int, n_train: int = 0, nlist: int | None = None,
+               hnsw_m: int = 32, pq_m: int | None = None, pq_nbits: int = 8,
+               codec: str = "float32", pca_dim: int | None = None) -> str:
+    """
+    faiss.index_factory string for one of INDEX_TYPES, with vectors stored
+    as one of VECTOR_CODECS and an optional PCA projection to pca_dim
+    (IndexPreTransform: queries are projected by the index itself)
+    """
+    if codec not in VECTOR_CODECS:
+        raise ValueError(f"Unknown vector codec '{codec}', expected one of {VECTOR_CODECS}")
+    prefix = ""
+    if pca_dim:
+        if not 0 < pca_dim < dim:
+            raise ValueError(f"pca_dim must be between 1 and {dim - 1}, got {pca_dim}")
+        prefix, dim = f"PCA{pca_dim},", pca_dim
+    storage = _SQ_CODES.get(codec, "Flat")
+
+    if index_type == "flat":
+        return prefix + storage
+    if index_type == "hnsw":
+        return prefix + (f"HNSW{hnsw_m},Flat" if codec == "float32" else f"HNSW{hnsw_m}_{storage}")
+
+    nlist = nlist or default_nlist(n_train)
+    if index_type == "ivf_flat":
+        return prefix + f"IVF{nlist},{storage}"
+    if index_type == "ivf_pq":
+        pq_m = pq_m or _largest_divisor(dim, dim // 8)
+        # PQ codebooks need ~39 * 2^nbits training points
+        while pq_nbits > 4 and n_train < 39 * (1 << pq_nbits):
+            pq_nbits -= 1
+        return prefix + f"IVF{nlist},PQ{pq_m}x{pq_nbits}"
+    raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+
+def needs_training(index_type: str, params: dict | None = None) -> bool:
+    """
+    False only for the plain float32 flat index (built directly by LangChain FAISS)
+    """
+    params = params or {}
+    return index_type != "flat" or params.get("codec", "float32") != "float32" or bool(params.get("pca_dim"))
+
+
+def _largest_divisor(dim: int, limit: int) -> int:
+    for m in range(max(limit, 1), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def build_index(index_type: str, train_vectors: np.ndarray, **params) -> faiss.Index:
+    """
+    Create (and train, for IVF variants) an empty FAISS index
+    """
+    train_vectors = np.ascontiguousarray(train_vectors, dtype="float32")
+    n_train, dim = train_vectors.shape
+    spec = index_spec(index_type, dim, n_train=n_train, **params)
+    index = faiss.index_factory(dim, spec, faiss.METRIC_L2)
+    if not index.is_trained:
+        index.train(train_vectors)
+    return index
+
+
+def set_search_params(index: faiss.Index, nprobe: int | None = None, ef_search: int | None = None):
+    """
+    Query-time knobs: nprobe (IVF lists visited), efSearch (HNSW beam width)
+    """
+    space = faiss.ParameterSpace()
+    if nprobe is not None and faiss.try_extract_index_ivf(index) is not None:
+        space.set_index_parameter(index, "nprobe", int(nprobe))
+    if ef_search is not None and "HNSW" in type(_unwrap(index)).__name__:
+        space.set_index_parameter(index, "efSearch", int(ef_search))
+
+
+def _unwrap(index: faiss.Index) -> faiss.Index:
+    index = faiss.downcast_index(index)
+    while isinstance(index, (faiss.IndexPreTransform, faiss.IndexIDMap)):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def empty_vector_store(embedding, index: faiss.Index) -> FAISS:
+    return FAISS(embedding, index, InMemoryDocstore(), {})
+
+
+class TrainingSpool:
+    """
+    Embedded batches of a build whose index needs training, spooled to
+    disk until the whole stream has been seen. A reservoir keeps a uniform
+    sample of `size` vectors across all of it, so IVF centroids, PQ
+    codebooks and PCA are fit to every source rather than the first books.
+    """
+
+    def __init__(self, path: str, size: int = DEFAULT_TRAIN_SIZE, seed: int = 0):
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        self.path = path
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.reservoir = None
+        self.seen = 0
+        self.n_batches = 0
+
+    def add(self, texts: list, vectors, metadatas: list, ids: list | None = None):
+        vectors = np.asarray(vectors, dtype="float32")
+        with open(os.path.join(self.path, f"{self.n_batches:06d}.pkl"), "wb") as f:
+            pickle.dump((texts, vectors, metadatas, ids), f)
+        self.n_batches += 1
+
+        if self.reservoir is None:
+            self.reservoir = np.empty((self.size, vectors.shape[1]), dtype="float32")
+        fill = min(max(self.size - self.seen, 0), len(vectors))
+        self.reservoir[self.seen:self.seen + fill] = vectors[:fill]
+        self.seen += fill
+        rest = vectors[fill:]
+        if len(rest):
+            # Vector number t replaces a random sample slot with probability size / (t + 1)
+            slots = self.rng.integers(0, self.seen + np.arange(len(rest)) + 1)
+            for slot, vector in zip(slots, rest):
+                if slot < self.size:
+                    self.reservoir[slot] = vector
+            self.seen += len(rest)
+
+    def sample(self) -> np.ndarray:
+        return self.reservoir[:min(self.seen, self.size)]
+
+    def build(self, embedding, index_type: str = "flat", **params) -> FAISS:
+        """
+        Train the index on the sample, then add the spooled batches back one at a time
+        """
+        sample = self.sample()
+        print(f"🧠 Training {index_type} index on {len(sample)} of {self.seen} vectors...")
+        vector_store = empty_vector_store(embedding, build_index(index_type, sample, **params))
+        for n in range(self.n_batches):
+            with open(os.path.join(self.path, f"{n:06d}.pkl"), "rb") as f:
+                texts, vectors, metadatas, ids = pickle.load(f)
+            vector_store.add_embeddings(list(zip(texts, vectors.tolist())), metadatas=metadatas, ids=ids)
+        self.close()
+        return vector_store
+
+    def close(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+# --------------------------------------------------
+# index_config.json (saved next to index.faiss)
+# --------------------------------------------------
+def write_index_config(persist_path: str, config: dict):
+    with open(os.path.join(persist_path, INDEX_CONFIG), "w") as f:
+        json.dump(config, f, indent=2)
+
+
+def read_index_config(persist_path: str) -> dict:
+    path = os.path.join(persist_path, INDEX_CONFIG)
+    if not os.path.exists(path):
+        return {"index_type": "flat"}
+    with open(path) as f:
+        return json.load(f)
+
+
+def apply_search_params(index: faiss.Index, persist_path: str):
+    """
+    Apply the saved nprobe / efSearch (FAISS_NPROBE / FAISS_EF_SEARCH override them)
+    """
+    config = read_index_config(persist_path)
+    nprobe = os.getenv("FAISS_NPROBE") or config.get("nprobe")
+    ef_search = os.getenv("FAISS_EF_SEARCH") or config.get("ef_search")
+    set_search_params(index, nprobe=nprobe, ef_search=ef_search)
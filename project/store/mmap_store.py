@@ -0,0 +1,200 @@
+"""
+Pickle-free on-disk index format.
+
+    faiss_index/index.faiss    FAISS vectors, opened with IO_FLAG_MMAP (shared page cache)
+    faiss_index/chunks.sqlite  row per index position: docstore id, text, metadata JSON
+
+N uvicorn workers map the same files instead of each unpickling the whole
+docstore; chunk texts are read from SQLite only for the hits of a query.
+
+    python -m project.store.mmap_store faiss_index   # export an existing (pickled) index
+"""
+import asyncio
+import contextvars
+import json
+import os
+import sqlite3
+import sys
+import threading
+from typing import Any, Dict, List
+
+import faiss
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from project.metrics import timed
+
+
+CHUNKS_DB = "chunks.sqlite"
+INDEX_FILE = "index.faiss"
+
+
+def has_mmap_store(persist_path: str) -> bool:
+    return os.path.exists(os.path.join(persist_path, CHUNKS_DB)) and \
+        os.path.exists(os.path.join(persist_path, INDEX_FILE))
+
+
+def export_chunks_db(vector_store, persist_path: str, positions=None):
+    """
+    Write chunks.sqlite for a LangChain FAISS store saved in persist_path
+    (only the given index positions, e.g. one shard, when positions is set)
+    """
+    db_path = os.path.join(persist_path, CHUNKS_DB)
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("CREATE TABLE chunks (pos INTEGER PRIMARY KEY, doc_id TEXT, text TEXT, metadata TEXT)")
+    rows = []
+    ids = vector_store.index_to_docstore_id
+    for pos in (ids if positions is None else positions):
+        doc_id = ids[int(pos)]
+        doc = vector_store.docstore.search(doc_id)
+        rows.append((int(pos), doc_id, doc.page_content, json.dumps(doc.metadata)))
+        if len(rows) >= 5000:
+            conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", rows)
+            rows = []
+    conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, db_path)
+
+
+def read_index_mmap(path: str) -> faiss.Index:
+    """
+    Memory-map the index (flat codes and IVF lists) instead of reading it into the heap
+    """
+    flags = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_READ_ONLY
+    try:
+        return faiss.read_index(path, flags)
+    except RuntimeError:
+        return faiss.read_index(path, faiss.IO_FLAG_READ_ONLY)
+
+
+def matches_filter(metadata: dict, filter: Dict[str, Any]) -> bool:
+    for key, value in filter.items():
+        if isinstance(value, list):
+            if metadata.get(key) not in value:
+                return False
+        elif metadata.get(key) != value:
+            return False
+    return True
+
+
+class MmapFaissStore:
+    def __init__(self, persist_path: str):
+        self.persist_path = persist_path
+        self.index = read_index_mmap(os.path.join(persist_path, INDEX_FILE))
+        self.db_path = os.path.join(persist_path, CHUNKS_DB)
+        self.local = threading.local()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # One read-only connection per thread
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            self.local.conn = conn
+        return conn
+
+    def documents_by_position(self, positions: List[int], scores: List[float] | None = None) -> Dict[int, Document]:
+        if not positions:
+            return {}
+        marks = ",".join("?" * len(positions))
+        rows = self.conn.execute(
+            f"SELECT pos, doc_id, text, metadata FROM chunks WHERE pos IN ({marks})", positions
+        ).fetchall()
+        score_of = dict(zip(positions, scores)) if scores is not None else {}
+        docs = {}
+        for pos, doc_id, text, metadata in rows:
+            metadata = json.loads(metadata)
+            if pos in score_of:
+                metadata["score"] = float(score_of[pos])
+            docs[pos] = Document(id=doc_id, page_content=text, metadata=metadata)
+        return docs
+
+    def get_documents(self, positions: List[int], scores: List[float] | None = None) -> List[Document]:
+        if scores is not None:
+            scores = [s for p, s in zip(positions, scores) if p >= 0]
+        positions = [int(p) for p in positions if p >= 0]
+        by_pos = self.documents_by_position(positions, scores)
+        return [by_pos[pos] for pos in positions if pos in by_pos]
+
+    def search_by_vector(self, vector, k: int = 3, filter: Dict[str, Any] | None = None,
+                         fetch_k: int = 50) -> List[Document]:
+        query = np.asarray([vector], dtype="float32")
+        with timed("faiss_search"):
+            distances, positions = self.index.search(query, fetch_k if filter else k)
+        return self._documents(positions, distances, k, filter)[0]
+
+    def search_by_vectors(self, vectors, k: int = 3, filter: Dict[str, Any] | None = None,
+                          fetch_k: int = 50) -> List[List[Document]]:
+        """
+        One FAISS search over a whole query matrix
+        """
+        with timed("faiss_search_batch"):
+            distances, positions = self.index.search(np.asarray(vectors, dtype="float32"), fetch_k if filter else k)
+        return self._documents(positions, distances, k, filter)
+
+    def search_matrix(self, vectors, k: int = 3, filter: Dict[str, Any] | None = None,
+                      fetch_k: int = 50) -> List[List[Document]]:
+        """
+        search_by_vectors without stage timing (one shard of a ShardedFaissStore)
+        """
+        distances, positions = self.index.search(np.asarray(vectors, dtype="float32"), fetch_k if filter else k)
+        return self._documents(positions, distances, k, filter)
+
+    def _documents(self, positions, distances, k: int, filter: Dict[str, Any] | None) -> List[List[Document]]:
+        results = []
+        for p, d in zip(positions, distances):
+            docs = self.get_documents(p.tolist(), d.tolist())
+            if filter:
+                docs = [doc for doc in docs if matches_filter(doc.metadata, filter)]
+            results.append(docs[:k])
+        return results
+
+
+class MmapFaissRetriever(BaseRetriever):
+    """
+    Retriever over an MmapFaissStore; search_kwargs accepts k, fetch_k and a
+    metadata filter like the LangChain FAISS retriever
+    """
+
+    store: Any
+    embedding: Any
+    search_kwargs: dict = {"k": 3}
+
+    def _search(self, vector) -> List[Document]:
+        return self.store.search_by_vector(vector, **self.search_kwargs)
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self._search(self.embedding.embed_query(query))
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        vector = await self.embedding.aembed_query(query)
+        # FAISS releases the GIL while searching; the copied context keeps the request's timings
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(None, context.run, self._search, vector)
+
+
+def load_mmap_retriever(persist_path: str, embedding, k: int = 3) -> MmapFaissRetriever:
+    from project.store.index_factory import apply_search_params
+
+    store = MmapFaissStore(persist_path)
+    apply_search_params(store.index, persist_path)
+    return MmapFaissRetriever(store=store, embedding=embedding, search_kwargs={"k": k})
+
+
+if __name__ == "__main__":
+    from langchain_community.vectorstores import FAISS
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "faiss_index"
+    # Export only needs the docstore, no embedding model
+    vector_store = FAISS.load_local(path, lambda text: [], allow_dangerous_deserialization=True)
+    export_chunks_db(vector_store, path)
+    print(f"✅ Wrote {os.path.join(path, CHUNKS_DB)} ({len(vector_store.index_to_docstore_id)} chunks)")
@@ -0,0 +1,240 @@
+"""
+Sharded on-disk index with parallel fan-out search.
+
+    faiss_index/shards.json              number of shards and the partition scheme
+    faiss_index/shard_assignment.npy     shard of every global index position
+    faiss_index/shards/000/index.faiss   shard vectors, ids = global positions
+    faiss_index/shards/000/chunks.sqlite the shard's chunks (pos = global position)
+
+Chunks are partitioned by a hash of their docstore id, so a chunk stays in
+the same shard across rebuilds. A query is searched on every shard in
+parallel and the per-shard top-k lists are merged by distance. Shards are
+searched by a thread pool (FAISS releases the GIL) or, with mode="process",
+by local worker processes that map the same files; a remote shard only has
+to answer search_matrix() the same way.
+"""
+import json
+import multiprocessing
+import os
+import weakref
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+
+from project.metrics import timed
+from project.store.index_factory import apply_search_params
+from project.store.mmap_store import INDEX_FILE, MmapFaissRetriever, MmapFaissStore, export_chunks_db
+
+
+SHARDS_CONFIG = "shards.json"
+SHARD_ASSIGNMENT = "shard_assignment.npy"
+SHARDS_DIR = "shards"
+SHARD_MODES = ("thread", "process")
+
+
+def has_shards(persist_path: str) -> bool:
+    return os.path.exists(os.path.join(persist_path, SHARDS_CONFIG))
+
+
+def shard_of(doc_id: str, n_shards: int) -> int:
+    """
+    Stable shard of a chunk (crc32 of its docstore id)
+    """
+    return zlib.crc32(str(doc_id).encode()) % n_shards
+
+
+def shard_path(persist_path: str, shard_no: int) -> str:
+    return os.path.join(persist_path, SHARDS_DIR, f"{shard_no:03d}")
+
+
+def _empty_shard_index(index: faiss.Index) -> faiss.Index:
+    """
+    Empty copy of a (trained) index that accepts explicit ids
+    """
+    shard_index = faiss.clone_index(index)
+    shard_index.reset()
+    ivf = faiss.try_extract_index_ivf(shard_index)
+    if ivf is None:
+        # Flat / HNSW only number vectors sequentially
+        return faiss.IndexIDMap2(shard_index)
+    # An array direct map (left by reconstruct) forbids explicit ids
+    ivf.set_direct_map_type(faiss.DirectMap.NoMap)
+    return shard_index
+
+
+# --------------------------------------------------
+# Build
+# --------------------------------------------------
+def write_shards(vector_store, persist_path: str, n_shards: int) -> List[int]:
+    """
+    Partition a LangChain FAISS store into n_shards shard directories;
+    returns the number of chunks per shard
+    """
+    index = vector_store.index
+    template = _empty_shard_index(index)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.make_direct_map()
+
+    positions = sorted(vector_store.index_to_docstore_id)
+    assignment = np.full(index.ntotal, -1, dtype="int32")
+    for pos in positions:
+        assignment[pos] = shard_of(vector_store.index_to_docstore_id[pos], n_shards)
+
+    sizes = []
+    for shard_no in range(n_shards):
+        path = shard_path(persist_path, shard_no)
+        os.makedirs(path, exist_ok=True)
+        members = np.flatnonzero(assignment == shard_no).astype("int64")
+
+        shard_index = faiss.clone_index(template)
+        if len(members):
+            vectors = np.vstack([index.reconstruct(int(pos)) for pos in members]).astype("float32")
+            shard_index.add_with_ids(vectors, members)
+        faiss.write_index(shard_index, os.path.join(path, INDEX_FILE))
+        export_chunks_db(vector_store, path, positions=members.tolist())
+        sizes.append(len(members))
+
+    np.save(os.path.join(persist_path, SHARD_ASSIGNMENT), assignment)
+    with open(os.path.join(persist_path, SHARDS_CONFIG), "w") as f:
+        json.dump({"shards": n_shards, "partition": "crc32(doc_id)", "sizes": sizes}, f, indent=2)
+    print(f"🧩 Wrote {n_shards} shards: {sizes}")
+    return sizes
+
+
+def read_shards_config(persist_path: str) -> dict:
+    with open(os.path.join(persist_path, SHARDS_CONFIG)) as f:
+        return json.load(f)
+
+
+# --------------------------------------------------
+# Worker process side (mode="process")
+# --------------------------------------------------
+_worker_shards = None
+
+
+def _open_shards(persist_path: str) -> List[MmapFaissStore]:
+    shards = []
+    for shard_no in range(read_shards_config(persist_path)["shards"]):
+        shard = MmapFaissStore(shard_path(persist_path, shard_no))
+        apply_search_params(shard.index, persist_path)
+        shards.append(shard)
+    return shards
+
+
+def _init_shard_worker(persist_path: str):
+    global _worker_shards
+    faiss.omp_set_num_threads(1)
+    _worker_shards = _open_shards(persist_path)
+
+
+def _search_shard(shard_no: int, vectors, k: int, filter, fetch_k: int) -> List[List[Document]]:
+    return _worker_shards[shard_no].search_matrix(vectors, k=k, filter=filter, fetch_k=fetch_k)
+
+
+def merge_results(per_shard: List[List[List[Document]]], k: int) -> List[List[Document]]:
+    """
+    Per query, the k smallest distances over all shards' top-k lists
+    """
+    merged = []
+    for results in zip(*per_shard):
+        docs = [doc for shard_docs in results for doc in shard_docs]
+        docs.sort(key=lambda doc: doc.metadata["score"])
+        merged.append(docs[:k])
+    return merged
+
+
+class ShardedFaissStore:
+    """
+    MmapFaissStore interface (search_by_vector(s), get_documents) over N
+    shards, searched in parallel by threads or local worker processes.
+    """
+
+    def __init__(self, persist_path: str, mode: str = "thread", workers: int | None = None):
+        if mode not in SHARD_MODES:
+            raise ValueError(f"Unknown shard search mode '{mode}', expected one of {SHARD_MODES}")
+        self.persist_path = persist_path
+        self.mode = mode
+        self.shards = _open_shards(persist_path)
+        self.assignment = np.load(os.path.join(persist_path, SHARD_ASSIGNMENT), mmap_mode="r")
+        self.workers = workers or len(self.shards)
+
+        if mode == "process":
+            context = multiprocessing.get_context("spawn")
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_shard_worker,
+                                            initargs=(persist_path,))
+        else:
+            self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix="faiss-shard")
+        # Shut the pool down when a hot-swapped index is dropped
+        self._finalizer = weakref.finalize(self, self.pool.shutdown, False)
+
+    @property
+    def ntotal(self) -> int:
+        return sum(shard.index.ntotal for shard in self.shards)
+
+    def _fan_out(self, vectors, k: int, filter, fetch_k: int) -> List[List[Document]]:
+        vectors = np.asarray(vectors, dtype="float32")
+        if self.mode == "process":
+            futures = [self.pool.submit(_search_shard, shard_no, vectors, k, filter, fetch_k)
+                       for shard_no in range(len(self.shards))]
+        else:
+            futures = [self.pool.submit(shard.search_matrix, vectors, k, filter, fetch_k)
+                       for shard in self.shards]
+        return merge_results([future.result() for future in futures], k)
+
+    def search_by_vector(self, vector, k: int = 3, filter: Dict[str, Any] | None = None,
+                         fetch_k: int = 50) -> List[Document]:
+        with timed("faiss_search"):
+            return self._fan_out([vector], k, filter, fetch_k)[0]
+
+    def search_by_vectors(self, vectors, k: int = 3, filter: Dict[str, Any] | None = None,
+                          fetch_k: int = 50) -> List[List[Document]]:
+        with timed("faiss_search_batch"):
+            return self._fan_out(vectors, k, filter, fetch_k)
+
+    def get_documents(self, positions: List[int], scores: List[float] | None = None) -> List[Document]:
+        """
+        Documents by global position (BM25 hits), read from their shards
+        """
+        if scores is not None:
+            scores = [s for p, s in zip(positions, scores) if 0 <= p < len(self.assignment)]
+        positions = [int(p) for p in positions if 0 <= p < len(self.assignment)]
+        by_shard = {}
+        for i, pos in enumerate(positions):
+            shard_no = int(self.assignment[pos])
+            if shard_no >= 0:
+                by_shard.setdefault(shard_no, []).append(i)
+
+        by_pos = {}
+        for shard_no, items in by_shard.items():
+            shard_scores = [scores[i] for i in items] if scores is not None else None
+            by_pos.update(self.shards[shard_no].documents_by_position([positions[i] for i in items], shard_scores))
+        return [by_pos[pos] for pos in positions if pos in by_pos]
+
+    def close(self):
+        self._finalizer()
+
+    def stats(self) -> dict:
+        return {
+            "shards": len(self.shards),
+            "mode": self.mode,
+            "workers": self.workers,
+            "vectors": [shard.index.ntotal for shard in self.shards]
+        }
+
+
+def load_sharded_retriever(persist_path: str, embedding, k: int = 3, mode: str | None = None,
+                           workers: int | None = None) -> MmapFaissRetriever:
+    """
+    Retriever over a sharded index (SHARD_SEARCH=thread|process, SHARD_WORKERS)
+    """
+    store = ShardedFaissStore(
+        persist_path,
+        mode=mode or os.getenv("SHARD_SEARCH", "thread"),
+        workers=workers or int(os.getenv("SHARD_WORKERS", "0")) or None
+    )
+    return MmapFaissRetriever(store=store, embedding=embedding, search_kwargs={"k": k})
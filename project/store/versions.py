@@ -0,0 +1,173 @@
+"""
+Versioned index directories.
+
+    faiss_index/
+        CURRENT                     name of the live version (replaced atomically)
+        versions/20260101T120000-0/ one complete index per build
+        leases/<version>@<pid>      versions a server process still serves
+
+A build writes a new version directory and then flips CURRENT, so readers
+never see a half-written index. Old versions are garbage-collected once no
+live process holds a lease on them (the newest `keep` are always kept for
+rollback). A directory without CURRENT is the legacy flat layout and is
+served as is.
+"""
+import os
+import shutil
+import time
+
+
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+LEASES_DIR = "leases"
+LEGACY_VERSION = "legacy"
+
+# Index files of the legacy flat layout (removed by gc once a version is live)
+LEGACY_FILES = (
+    "index.faiss", "index.pkl", "chunks.sqlite", "metadata.json", "manifest.json",
+    "index_config.json", "bm25.npz", "bm25_vocab.json", "shards.json", "shard_assignment.npy", "shards"
+)
+
+
+def current_version(root: str) -> str | None:
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def has_index(path: str) -> bool:
+    """
+    An index was written to path (index.faiss, or shards.json for a sharded index);
+    the directory alone may only hold leases/
+    """
+    return any(os.path.exists(os.path.join(path, name)) for name in ("index.faiss", "shards.json"))
+
+
+def version_path(root: str, version: str) -> str:
+    if version == LEGACY_VERSION:
+        return root
+    return os.path.join(root, VERSIONS_DIR, version)
+
+
+def resolve_index_path(root: str) -> str:
+    """
+    Directory of the live index: versions/<CURRENT>, or root itself for the legacy layout
+    """
+    version = current_version(root)
+    return version_path(root, version) if version else root
+
+
+def list_versions(root: str) -> list:
+    path = os.path.join(root, VERSIONS_DIR)
+    if not os.path.isdir(path):
+        return []
+    return sorted(name for name in os.listdir(path) if not name.startswith("."))
+
+
+def new_version_name() -> str:
+    # Sorts chronologically; the pid keeps concurrent builders apart
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+
+
+def publish_version(root: str, staging_path: str) -> str:
+    """
+    Move a fully written index directory into versions/ and make it CURRENT
+    """
+    version = name = new_version_name()
+    os.makedirs(os.path.join(root, VERSIONS_DIR), exist_ok=True)
+    n = 1
+    while os.path.exists(version_path(root, version)):
+        # Several builds within one second; zero-padded so names still sort by age
+        version = f"{name}.{n:03d}"
+        n += 1
+    os.rename(staging_path, version_path(root, version))
+
+    tmp_path = os.path.join(root, f"{CURRENT_FILE}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+    print(f"✅ Published index version {version}")
+    return version
+
+
+# --------------------------------------------------
+# Leases (one file per serving process and version)
+# --------------------------------------------------
+def _lease_file(root: str, version: str, pid: int | None = None) -> str:
+    return os.path.join(root, LEASES_DIR, f"{version}@{pid or os.getpid()}")
+
+
+def acquire_lease(root: str, version: str):
+    os.makedirs(os.path.join(root, LEASES_DIR), exist_ok=True)
+    with open(_lease_file(root, version), "w") as f:
+        f.write(str(time.time()))
+
+
+def release_lease(root: str, version: str):
+    try:
+        os.remove(_lease_file(root, version))
+    except FileNotFoundError:
+        pass
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def leased_versions(root: str) -> set:
+    """
+    Versions with a lease from a live process; leases of dead processes are removed
+    """
+    path = os.path.join(root, LEASES_DIR)
+    if not os.path.isdir(path):
+        return set()
+    leased = set()
+    for name in os.listdir(path):
+        version, _, pid = name.rpartition("@")
+        if pid.isdigit() and _pid_alive(int(pid)):
+            leased.add(version)
+        else:
+            os.remove(os.path.join(path, name))
+    return leased
+
+
+def gc_versions(root: str, keep: int = 2) -> list:
+    """
+    Delete versions that are not CURRENT, not among the newest `keep` and not leased
+    """
+    current = current_version(root)
+    if current is None:
+        return []
+    versions = list_versions(root)
+    protected = {current} | set(versions[-keep:] if keep else []) | leased_versions(root)
+
+    removed = []
+    for version in versions:
+        if version not in protected:
+            shutil.rmtree(version_path(root, version), ignore_errors=True)
+            removed.append(version)
+
+    if LEGACY_VERSION not in protected:
+        legacy = [name for name in LEGACY_FILES if os.path.exists(os.path.join(root, name))]
+        for name in legacy:
+            path = os.path.join(root, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+        if legacy:
+            removed.append(LEGACY_VERSION)
+
+    if removed:
+        print(f"🧹 Removed index versions: {', '.join(removed)}")
+    return removed
@@ -0,0 +1,58 @@
+import json
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+
+def peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    """
+    Peak resident set size of this process in MB
+    (who=resource.RUSAGE_CHILDREN: largest finished child process)
+    """
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+class PhaseTimer:
+    def __init__(self, name: str = "startup"):
+        self.name = name
+        self.phases = []
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time one named phase (with timer.phase("load index"): ...)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({
+                "phase": name,
+                "seconds": round(time.perf_counter() - start, 4),
+                "peak_rss_mb": peak_rss_mb()
+            })
+
+    def report(self) -> dict:
+        return {
+            "name": self.name,
+            "total_seconds": round(time.perf_counter() - self.started, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "phases": list(self.phases)
+        }
+
+    def print_report(self):
+        report = self.report()
+        print(f"⏱️  {self.name} report")
+        for item in report["phases"]:
+            print(f"   {item['phase']:<24} {item['seconds']:>8.3f}s  (peak RSS {item['peak_rss_mb']} MB)")
+        print(f"   {'total':<24} {report['total_seconds']:>8.3f}s  (peak RSS {report['peak_rss_mb']} MB)")
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)